@@ -0,0 +1,50 @@
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+from .db import close_unusable_connections
+
+
+@lru_cache(maxsize=None)
+def get_view_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_VIEW_THREADS,
+        thread_name_prefix='api-view'
+    )
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    close_unusable_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not (
+            settings.ASYNC_VIEW_THREADS and isinstance(request, ASGIRequest)
+        ):
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await sync_to_async(
+            run_view, thread_sensitive=False, executor=get_view_executor()
+        )(view, request, *args, **kwargs)
+    return wrapper
+
+
+class AsyncViewMixin:
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return async_view(super().as_view(*args, **kwargs))
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+def get_token_cache_key(key):
+    return f'auth_token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+class LocalUserCache:
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if time.monotonic() >= expires:
+                del self._users[key]
+                return None
+            self._users.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        if not self.size or not self.ttl:
+            return
+        with self._lock:
+            self._users[key] = (user, time.monotonic() + self.ttl)
+            self._users.move_to_end(key)
+            while len(self._users) > self.size:
+                self._users.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._users.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+local_users = LocalUserCache(
+    settings.AUTH_TOKEN_LOCAL_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_TIMEOUT
+)
+
+
+def get_cached_user(key):
+    values = local_users.get(key)
+    if values is None:
+        if not settings.CACHE_IS_SHARED:
+            return None
+        values = cache.get(get_token_cache_key(key))
+        if values is None:
+            return None
+        local_users.set(key, values)
+    cached = dict(zip(User.token_cache_fields, values))
+    user = User.from_db(DEFAULT_DB_ALIAS, User.token_cache_fields, [
+        cached.get(field.attname, DEFERRED)
+        for field in User._meta.concrete_fields
+    ])
+    user.token_cache_values = cached
+    return user
+
+
+def cache_user(key, user):
+    values = tuple(getattr(user, field) for field in User.token_cache_fields)
+    if settings.CACHE_IS_SHARED:
+        cache.set(
+            get_token_cache_key(key), values,
+            settings.AUTH_TOKEN_CACHE_TIMEOUT
+        )
+    local_users.set(key, values)
+
+
+def evict_tokens(keys):
+    keys = list(keys)
+    for key in keys:
+        local_users.delete(key)
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+def evict_user_tokens(user_ids):
+    evict_tokens(Token.objects.filter(user_id__in=user_ids).values_list(
+        'key', flat=True
+    ))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = get_cached_user(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache_user(key, user)
+            return user, token
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,71 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .db import primary_reads
+
+
+def get_version_key(model, *parts):
+    return ':'.join(('version', model._meta.label_lower, *map(str, parts)))
+
+
+def get_cache_version(model, *parts):
+    return cache.get_or_set(
+        get_version_key(model, *parts), uuid.uuid4().hex, None
+    )
+
+
+def bump_cache_version(model, *parts):
+    key = get_version_key(model, *parts)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def get_etag(*parts):
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_cache_versions(model, ids):
+    keys = {get_version_key(model, pk): pk for pk in ids}
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_cache_versions(model, ids):
+    keys = [get_version_key(model, pk) for pk in ids]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(
+            {key: uuid.uuid4().hex for key in keys}, None
+        ))
+
+
+def build_once(key, build, timeout):
+    if not settings.CACHE_IS_SHARED:
+        return build()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock_key = f'lock:{key}'
+    if cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            with primary_reads():
+                value = build()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return build()
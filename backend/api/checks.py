@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core import checks
+
+from .db import get_replica_alias
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CACHE_IS_SHARED or settings.DEBUG:
+        return []
+    return [checks.Warning(
+        'Кеш не общий для процессов: кеширование ответов по версиям, '
+        'ETag и кеш фрагментов рецептов отключены, пользователи по токенам '
+        'кешируются только в памяти воркера, и выход или деактивация '
+        'доходят до других воркеров с задержкой до '
+        f'{settings.AUTH_TOKEN_LOCAL_TIMEOUT} с.',
+        hint='Задайте CACHE_BACKEND и CACHE_LOCATION (например, Memcached).',
+        id='api.W001',
+    )]
+
+
+@checks.register(checks.Tags.caches, checks.Tags.database)
+def check_replica_cache(app_configs, **kwargs):
+    if settings.CACHE_IS_SHARED or get_replica_alias() is None:
+        return []
+    return [checks.Warning(
+        'Реплика БД настроена, но кеш не общий для процессов: после записи '
+        'пользователь может прочитать устаревшие данные с реплики в другом '
+        'воркере.',
+        hint='Задайте CACHE_BACKEND и CACHE_LOCATION или уберите '
+             'DB_REPLICA_HOST.',
+        id='api.W002',
+    )]
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_alias():
+    alias = settings.DATABASE_REPLICA
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def primary_reads():
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def get_sticky_key(user):
+    return f'db_primary:{user.pk}'
+
+
+def pin_to_primary(user):
+    cache.set(get_sticky_key(user), True, settings.DATABASE_REPLICA_STICKY)
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and bool(cache.get(get_sticky_key(user)))
+
+
+def close_unusable_connections():
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if replica_reads.get():
+            return get_replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != get_replica_alias()
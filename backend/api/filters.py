@@ -1,30 +1,81 @@
+from django.conf import settings
+from django.db.models import Case, Exists, OuterRef, When
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Recipe
+from .cache import build_once, get_cache_version
+from ingredients.search import ingredient_index
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.search import search_recipes
+from tags.models import Tag
+
+
+def get_tag_map():
+    return build_once(
+        f'tag_map:{get_cache_version(Tag)}',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        settings.REFERENCE_CACHE_TIMEOUT
+    )
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_map()]
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method='filter_tags'
+    )
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.OrderingFilter(
+        fields=(('favorites_count', 'popularity'), ('pub_date', 'pub_date'))
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
 
+    def filter_tags(self, queryset, name, value):
+        tag_map = get_tag_map()
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=[tag_map[slug] for slug in value if slug in tag_map]
+        )))
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
     def filter_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(favorites__user=self.request.user)
-        return queryset.exclude(favorites__user=self.request.user)
+        return self.filter_user_relation(queryset, Favorite, value)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(shoping_cart__user=self.request.user)
-        return queryset.exclude(shoping_cart__user=self.request.user)
+        return self.filter_user_relation(queryset, ShoppingCart, value)
 
+    def filter_user_relation(self, queryset, model, value):
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none() if value else queryset
+        related = Exists(
+            model.objects.filter(recipe=OuterRef('pk'), user=user)
+        )
+        return queryset.filter(related if value else ~related)
 
-class IngredientSearchFilter(SearchFilter):
+
+class IngredientSearchFilter(BaseFilterBackend):
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param, '').strip()
+        if not name:
+            return queryset
+        ids = ingredient_index.search(name, settings.INGREDIENT_SEARCH_LIMIT)
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ids).order_by(
+            Case(*[When(pk=pk, then=position)
+                   for position, pk in enumerate(ids)])
+        )
@@ -0,0 +1,180 @@
+import csv
+import json
+import os
+import time
+
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.dispatch import Signal
+
+from .cache import bump_cache_version
+
+CHUNK_SIZE = 64 * 1024
+
+bulk_loaded = Signal()
+
+
+def iter_json(file, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив.')
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Некорректный JSON-файл.')
+            end = None
+        if end is None or (end == len(buffer) and not eof):
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_csv(file, fields):
+    for number, row in enumerate(csv.reader(file)):
+        row = [value.strip() for value in row]
+        if not row or (number == 0 and tuple(row) == tuple(fields)):
+            continue
+        yield dict(zip(fields, row))
+
+
+def iter_batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class BaseLoadCommand(BaseCommand):
+    model = None
+    fields = ()
+    unique_fields = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument("file_path", type=str)
+        parser.add_argument("--format", choices=('json', 'csv'))
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--on-conflict", choices=('skip', 'update'), default='skip'
+        )
+        parser.add_argument("--dry-run", action='store_true')
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        file_path = options["file_path"]
+        file_format = options["format"] or os.path.splitext(
+            file_path
+        )[1].lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError(f'Неизвестный формат файла: {file_path}')
+        stats = Counter()
+        started = time.monotonic()
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            if file_format == 'json':
+                items = iter_json(file)
+            else:
+                items = iter_csv(file, self.fields)
+            for batch in iter_batches(items, options["batch_size"]):
+                with transaction.atomic():
+                    self.load_batch(batch, options["on_conflict"], stats)
+                    transaction.set_rollback(options["dry_run"])
+                self.report(stats, started)
+        if not options["dry_run"] and (stats['created'] or stats['updated']):
+            bump_cache_version(self.model)
+        self.stdout.write(self.style.SUCCESS(
+            ('Dry run: ' if options["dry_run"] else 'Done: ')
+            + self.format_stats(stats, started)
+        ))
+
+    def get_key(self, item):
+        return tuple(item[field] for field in self.unique_fields)
+
+    def get_present_keys(self, keys):
+        lookup = f'{self.unique_fields[0]}__in'
+        return {
+            key for key in self.model.objects.filter(
+                **{lookup: {key[0] for key in keys}}
+            ).values_list(*self.unique_fields) if key in keys
+        }
+
+    def clean_item(self, row, number):
+        try:
+            return {field: row[field] for field in self.fields}
+        except (KeyError, TypeError):
+            raise CommandError(
+                f'Строка {number}: ожидались поля {", ".join(self.fields)}.'
+            )
+
+    def load_batch(self, batch, on_conflict, stats):
+        items = {}
+        for row in batch:
+            stats['read'] += 1
+            item = self.clean_item(row, stats['read'])
+            items[self.get_key(item)] = item
+        lookup = f'{self.unique_fields[0]}__in'
+        existing = {
+            self.get_key(vars(obj)): obj for obj in self.model.objects.filter(
+                **{lookup: {key[0] for key in items}}
+            )
+        }
+        update_fields = [
+            field for field in self.fields if field not in self.unique_fields
+        ]
+        changed = []
+        if on_conflict == 'update':
+            for key, obj in existing.items():
+                item = items.get(key)
+                if item is None or all(
+                    getattr(obj, field) == item[field]
+                    for field in update_fields
+                ):
+                    continue
+                for field in update_fields:
+                    setattr(obj, field, item[field])
+                changed.append(obj)
+        if changed:
+            self.model.objects.bulk_update(changed, update_fields)
+            bulk_loaded.send(
+                sender=self.model, pks=[obj.pk for obj in changed]
+            )
+        created = {
+            key: self.model(**item) for key, item in items.items()
+            if key not in existing
+        }
+        present = self.get_present_keys(created)
+        self.model.objects.bulk_create(
+            created.values(), ignore_conflicts=True
+        )
+        inserted = len(self.get_present_keys(created) - present)
+        stats['created'] += inserted
+        stats['updated'] += len(changed)
+        stats['skipped'] += len(batch) - inserted - len(changed)
+
+    def format_stats(self, stats, started):
+        elapsed = time.monotonic() - started
+        return (
+            f'{stats["read"]} read, {stats["created"]} created, '
+            f'{stats["updated"]} updated, {stats["skipped"]} skipped '
+            f'in {elapsed:.1f}s ({stats["read"] / (elapsed or 1):.0f} rows/s)'
+        )
+
+    def report(self, stats, started):
+        if self.verbosity >= 1:
+            self.stdout.write(self.format_stats(stats, started))
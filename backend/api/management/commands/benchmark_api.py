@@ -0,0 +1,418 @@
+import base64
+import io
+import json
+import math
+import platform
+import secrets
+import time
+import uuid
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import combinations
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from .seed_data import SEED_PASSWORD, SEED_PREFIX
+from ingredients.models import Ingredient
+from jobs.models import Job
+from recipes.models import Recipe
+from tags.models import Tag
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(timings, value):
+    index = max(0, math.ceil(len(timings) * value / 100) - 1)
+    return timings[index]
+
+
+def get_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 60)).save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Command(BaseCommand):
+    help = "Benchmarks API routes in-process and reports latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--only", nargs='*', default=())
+        parser.add_argument("--writes", action='store_true')
+        parser.add_argument("--output", type=str)
+        parser.add_argument("--compare", type=str)
+
+    def handle(self, *args, **options):
+        self.user = User.objects.filter(
+            username__startswith=SEED_PREFIX,
+            subscriptions_subscriber__isnull=False
+        ).order_by('pk').first()
+        if self.user is None:
+            raise CommandError('Сначала выполните команду seed_data.')
+        self.token = Token.objects.get_or_create(user=self.user)[0].key
+        self.metrics_token = settings.METRICS_TOKEN or secrets.token_hex()
+        scenarios = self.get_scenarios()
+        if options["writes"]:
+            scenarios += self.get_write_scenarios()
+        if options["only"]:
+            scenarios = [
+                scenario for scenario in scenarios
+                if any(name in scenario[0] for name in options["only"])
+            ]
+        results = {}
+        with override_settings(METRICS_TOKEN=self.metrics_token):
+            for name, run in scenarios:
+                results[name] = self.benchmark(run, options)
+                self.stdout.write(self.format_result(name, results[name]))
+        report = {'meta': self.get_meta(options), 'scenarios': results}
+        if options["output"]:
+            with open(options["output"], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Saved to {options["output"]}')
+        if options["compare"]:
+            self.compare(results, options["compare"])
+
+    def get_client(self, authorized=True):
+        if authorized:
+            return Client(
+                raise_request_exception=False,
+                HTTP_AUTHORIZATION=f'Token {self.token}'
+            )
+        return Client(raise_request_exception=False)
+
+    def get(self, path, data=None, authorized=True, **extra):
+        def run(client, anonymous):
+            return [
+                (client if authorized else anonymous).get(path, data, **extra)
+            ]
+        return run
+
+    def get_scenarios(self):
+        user = self.user.pk
+        author = User.objects.filter(
+            subscriptions_author__subscriber=self.user
+        ).values_list('pk', flat=True).first()
+        recipe = Recipe.objects.filter(author_id=author).values_list(
+            'pk', flat=True
+        ).first()
+        tag = Tag.objects.values_list('pk', 'slug').first()
+        ingredient = Ingredient.objects.values_list('pk', 'name').first()
+        recipe_filters = {
+            'tags': tag[1],
+            'author': author,
+            'is_favorited': 1,
+            'is_in_shopping_cart': 1,
+        }
+        scenarios = [
+            ('tags list', self.get('/api/tags/')),
+            ('tags detail', self.get(f'/api/tags/{tag[0]}/')),
+            ('ingredients list', self.get('/api/ingredients/')),
+            ('ingredients search', self.get(
+                '/api/ingredients/', {'name': ingredient[1][:3]}
+            )),
+            ('ingredients detail', self.get(
+                f'/api/ingredients/{ingredient[0]}/'
+            )),
+            ('recipes list anonymous', self.get(
+                '/api/recipes/', authorized=False
+            )),
+        ]
+        for size in range(len(recipe_filters) + 1):
+            for names in combinations(recipe_filters, size):
+                scenarios.append((
+                    'recipes list ' + (' + '.join(names) or 'unfiltered'),
+                    self.get('/api/recipes/', {
+                        name: recipe_filters[name] for name in names
+                    })
+                ))
+        scenarios += [
+            ('recipes list not favorited', self.get(
+                '/api/recipes/', {'is_favorited': 0}
+            )),
+            ('recipes list not in shopping cart', self.get(
+                '/api/recipes/', {'is_in_shopping_cart': 0}
+            )),
+            ('recipes list search', self.get('/api/recipes/', {
+                'search': Recipe.objects.get(pk=recipe).name.split()[0]
+            })),
+            ('recipes list popularity', self.get(
+                '/api/recipes/', {'ordering': '-popularity'}
+            )),
+            ('recipes list cursor', self.get(
+                '/api/recipes/', {'pagination': 'cursor'}
+            )),
+            ('recipes list page 5', self.get(
+                '/api/recipes/', {'page': 5, 'limit': 6}
+            )),
+            ('recipes list fields', self.get(
+                '/api/recipes/', {'fields': 'id,name,image,is_favorited'}
+            )),
+            ('recipes detail', self.get(f'/api/recipes/{recipe}/')),
+            ('recipes feed', self.get('/api/recipes/feed/')),
+            ('recipes download_shopping_cart', self.get(
+                '/api/recipes/download_shopping_cart/'
+            )),
+            ('users list', self.get('/api/users/')),
+            ('users detail', self.get(f'/api/users/{author}/')),
+            ('users me', self.get('/api/users/me/')),
+            ('users subscriptions', self.get('/api/users/subscriptions/')),
+            ('users subscriptions recipes_limit', self.get(
+                '/api/users/subscriptions/', {'recipes_limit': 3}
+            )),
+        ]
+        job = Job.objects.filter(user_id=user).values_list(
+            'pk', flat=True
+        ).first()
+        if job is None:
+            job = Job.objects.create(
+                name='benchmark', user_id=user, status=Job.DONE
+            ).pk
+        scenarios += [
+            ('jobs detail', self.get(f'/api/jobs/{job}/')),
+            ('metrics', self.get(
+                '/api/metrics/', authorized=False,
+                HTTP_AUTHORIZATION=f'Bearer {self.metrics_token}'
+            )),
+        ]
+        return scenarios
+
+    def get_write_scenarios(self):
+        recipe = Recipe.objects.exclude(favorites__user=self.user).exclude(
+            shoping_cart__user=self.user
+        ).exclude(author=self.user).values_list('pk', flat=True).first()
+        batch = list(Recipe.objects.exclude(favorites__user=self.user).exclude(
+            author=self.user
+        ).values_list('pk', flat=True)[:20])
+        author = User.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).exclude(
+            subscriptions_author__subscriber=self.user
+        ).exclude(pk=self.user.pk).values_list('pk', flat=True).first()
+        payload = json.dumps({
+            'ingredients': [
+                {'id': pk, 'amount': 10}
+                for pk in Ingredient.objects.values_list('pk', flat=True)[:5]
+            ],
+            'tags': list(Tag.objects.values_list('pk', flat=True)[:2]),
+            'image': get_image(),
+            'name': 'Тестовый рецепт',
+            'text': 'Описание тестового рецепта',
+            'cooking_time': 15,
+        })
+        batch_payload = json.dumps({'recipes': batch})
+        login_email = User.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).exclude(pk=self.user.pk).values_list('email', flat=True).first()
+        login_payload = json.dumps({
+            'email': login_email, 'password': SEED_PASSWORD
+        })
+
+        def toggle(path, data=None):
+            def run(client, anonymous):
+                return [
+                    client.post(path, data, content_type='application/json'),
+                    client.delete(path, data, content_type='application/json'),
+                ]
+            return run
+
+        def create_recipe(client, anonymous):
+            created = client.post(
+                '/api/recipes/', payload, content_type='application/json'
+            )
+            if created.status_code != 201:
+                return [created]
+            path = f'/api/recipes/{created.json()["id"]}/'
+            return [
+                created,
+                client.patch(
+                    path, payload, content_type='application/json'
+                ),
+                client.delete(path),
+            ]
+
+        def login(client, anonymous):
+            logged_in = anonymous.post(
+                '/api/auth/token/login/', login_payload,
+                content_type='application/json'
+            )
+            if logged_in.status_code != 200:
+                return [logged_in]
+            return [logged_in, anonymous.post(
+                '/api/auth/token/logout/',
+                HTTP_AUTHORIZATION=f'Token {logged_in.json()["auth_token"]}'
+            )]
+
+        return [
+            ('write favorite', toggle(f'/api/recipes/{recipe}/favorite/')),
+            ('write shopping_cart', toggle(
+                f'/api/recipes/{recipe}/shopping_cart/'
+            )),
+            ('write favorite batch', toggle(
+                '/api/recipes/favorite/', batch_payload
+            )),
+            ('write shopping_cart batch', toggle(
+                '/api/recipes/shopping_cart/', batch_payload
+            )),
+            ('write subscribe', toggle(f'/api/users/{author}/subscribe/')),
+            ('write recipe create/update/delete', create_recipe),
+            ('write token login/logout', login),
+        ] + self.get_user_write_scenarios()
+
+    def get_user_write_scenarios(self):
+        password_payloads = [
+            json.dumps({
+                'current_password': current, 'new_password': new
+            }) for current, new in (
+                (SEED_PASSWORD, f'{SEED_PASSWORD}-new'),
+                (f'{SEED_PASSWORD}-new', SEED_PASSWORD),
+            )
+        ]
+
+        def set_password(client, anonymous):
+            return [
+                client.post(
+                    '/api/users/set_password/', data,
+                    content_type='application/json'
+                ) for data in password_payloads
+            ]
+
+        def signup(client, anonymous):
+            username = f'{SEED_PREFIX}bench_{uuid.uuid4().hex[:12]}'
+            credentials = {
+                'email': f'{username}@example.com', 'password': SEED_PASSWORD
+            }
+            created = anonymous.post('/api/users/', json.dumps({
+                **credentials, 'username': username,
+                'first_name': 'Bench', 'last_name': 'User',
+            }), content_type='application/json')
+            if created.status_code != 201:
+                return [created]
+            logged_in = anonymous.post(
+                '/api/auth/token/login/', json.dumps(credentials),
+                content_type='application/json'
+            )
+            if logged_in.status_code != 200:
+                User.objects.filter(username=username).delete()
+                return [created, logged_in]
+            return [created, logged_in, anonymous.delete(
+                '/api/users/me/',
+                json.dumps({'current_password': SEED_PASSWORD}),
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Token {logged_in.json()["auth_token"]}'
+            )]
+
+        return [
+            ('write user set_password', set_password),
+            ('write user signup/login/delete', signup),
+        ]
+
+    def run_requests(self, run, count):
+        client, anonymous = self.get_client(), self.get_client(False)
+        timings, statuses = [], Counter()
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                responses = run(client, anonymous)
+                timings.append(time.perf_counter() - started)
+                for response in responses:
+                    statuses[response.status_code] += 1
+                    response.close()
+        finally:
+            close_old_connections()
+        return timings, statuses
+
+    def benchmark(self, run, options):
+        concurrency = max(1, options["concurrency"])
+        self.run_requests(run, options["warmup"])
+        counts = [
+            options["requests"] // concurrency
+            + (worker < options["requests"] % concurrency)
+            for worker in range(concurrency)
+        ]
+        started = time.perf_counter()
+        if concurrency == 1:
+            results = [self.run_requests(run, counts[0])]
+        else:
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(
+                    lambda count: self.run_requests(run, count), counts
+                ))
+        elapsed = time.perf_counter() - started
+        timings = sorted(
+            timing for worker_timings, _ in results
+            for timing in worker_timings
+        )
+        statuses = sum((worker_statuses for _, worker_statuses in results),
+                       Counter())
+        result = {
+            'requests': len(timings),
+            'errors': sum(
+                count for code, count in statuses.items() if code >= 400
+            ),
+            'statuses': {
+                str(code): count for code, count in sorted(statuses.items())
+            },
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+            'rps': round(len(timings) / elapsed, 1),
+        }
+        for value in PERCENTILES:
+            result[f'p{value}_ms'] = round(
+                percentile(timings, value) * 1000, 3
+            )
+        return result
+
+    def get_meta(self, options):
+        return {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'requests': options["requests"],
+            'warmup': options["warmup"],
+            'concurrency': options["concurrency"],
+            'writes': options["writes"],
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'ingredients': Ingredient.objects.count(),
+                'tags': Tag.objects.count(),
+            },
+        }
+
+    @staticmethod
+    def format_result(name, result):
+        return (
+            f'{name:<64} {result["rps"]:>8.1f} rps  '
+            + '  '.join(
+                f'p{value} {result[f"p{value}_ms"]:>8.2f} ms'
+                for value in PERCENTILES
+            )
+            + (f'  errors {result["errors"]}' if result["errors"] else '')
+        )
+
+    def compare(self, results, path):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['scenarios']
+        self.stdout.write(f'Compared to {path}:')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            changes = '  '.join(
+                f'{key} {(result[key] / baseline[name][key] - 1) * 100:+.1f}%'
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'rps')
+                if baseline[name][key]
+            )
+            self.stdout.write(f'{name:<64} {changes}')
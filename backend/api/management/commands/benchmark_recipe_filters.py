@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.filters import RecipeFilter
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+User = get_user_model()
+
+FILTERS = (
+    {'is_favorited': '1'},
+    {'is_favorited': '0'},
+    {'is_in_shopping_cart': '1'},
+    {'is_in_shopping_cart': '0'},
+)
+
+
+class Command(BaseCommand):
+    help = "Seeds a temporary dataset and benchmarks recipe flag filters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--ratio", type=float, default=0.05)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(
+                options["users"], options["recipes"], options["ratio"]
+            )
+            for data in FILTERS:
+                self.benchmark(user, data, options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, users_count, recipes_count, ratio):
+        User.objects.bulk_create(
+            User(
+                username=f'bench_{i}', email=f'bench_{i}@example.com',
+                first_name='bench', last_name='bench'
+            ) for i in range(users_count)
+        )
+        users = list(User.objects.filter(username__startswith='bench_'))
+        Recipe.objects.bulk_create(
+            Recipe(
+                name=f'Рецепт {i}', text='bench', image='recipes/bench.png',
+                cooking_time=10, author=random.choice(users)
+            ) for i in range(recipes_count)
+        )
+        recipes = list(Recipe.objects.values_list('pk', flat=True))
+        sample_size = min(len(recipes), int(recipes_count * ratio))
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe_id=recipe) for user in users
+                for recipe in random.sample(recipes, sample_size)
+            )
+        return users[0]
+
+    def benchmark(self, user, data, repeat):
+        queryset = RecipeFilter(
+            data=data, queryset=Recipe.objects.all(),
+            request=SimpleNamespace(user=user)
+        ).qs.values_list('pk', flat=True)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = len(queryset.all())
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f'{data}: {count} rows, '
+            f'median {statistics.median(timings) * 1000:.2f} ms'
+        )
+        self.stdout.write(queryset.explain())
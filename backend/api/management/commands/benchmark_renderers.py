@@ -0,0 +1,83 @@
+import io
+import statistics
+import time
+
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework import parsers, renderers
+from rest_framework.request import Request
+
+from api.renderers import ORJSONParser, ORJSONRenderer
+from api.serializers import IngredientSerializer, RecipeReadSerializer
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compares JSON renderers and parsers on real API payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if not Recipe.objects.exists():
+            raise CommandError('Сначала выполните команду seed_data.')
+        for name, data in self.get_payloads(options["recipes"]):
+            self.benchmark(name, data, options["repeat"])
+
+    def get_payloads(self, recipes_count):
+        user = User.objects.filter(
+            favorites__isnull=False
+        ).first() or AnonymousUser()
+        request = Request(RequestFactory().get('/api/recipes/'))
+        request.user = user
+        context = {
+            'request': request, 'view': SimpleNamespace(action='list')
+        }
+        queryset = RecipeReadSerializer.get_related_queries(
+            Recipe.objects.all(), user
+        )[:recipes_count]
+        yield (
+            f'recipes page ({recipes_count})',
+            RecipeReadSerializer(queryset, many=True, context=context).data
+        )
+        yield (
+            'ingredients catalog',
+            IngredientSerializer(Ingredient.objects.all(), many=True).data
+        )
+
+    def measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def benchmark(self, name, data, repeat):
+        stock = renderers.JSONRenderer().render(data)
+        fast = ORJSONRenderer().render(data)
+        self.stdout.write(
+            f'{name}: {len(stock)} bytes, '
+            f'identical output: {"yes" if stock == fast else "NO"}'
+        )
+        for label, func in (
+            ('render json', lambda: renderers.JSONRenderer().render(data)),
+            ('render orjson', lambda: ORJSONRenderer().render(data)),
+            ('parse json', lambda: parsers.JSONParser().parse(
+                io.BytesIO(stock)
+            )),
+            ('parse orjson', lambda: ORJSONParser().parse(
+                io.BytesIO(stock)
+            )),
+        ):
+            self.stdout.write(
+                f'  {label:<14} median {self.measure(func, repeat):.3f} ms'
+            )
@@ -0,0 +1,196 @@
+import io
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from api.cache import bump_cache_version
+from ingredients.models import Ingredient
+from recipes.images import build_image_variants
+from recipes.models import (
+    Favorite, FeedItem, IngredientRecipe, Recipe, ShoppingCart,
+    ShoppingListItem,
+)
+from recipes.search import update_search_index
+from recipes.signals import shopping_list_changed
+from tags.models import Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'seed-password'
+SEED_IMAGE = 'recipes/seed.jpg'
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'омлет', 'рагу', 'запеканка', 'паста',
+    'куриный', 'овощной', 'грибной', 'сырный', 'домашний', 'быстрый',
+    'летний', 'острый', 'сладкий', 'томатный', 'с картофелем', 'с рисом',
+)
+
+
+class Command(BaseCommand):
+    help = "Seeds a synthetic dataset for load benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=20)
+        parser.add_argument("--ingredients", type=int, default=8)
+        parser.add_argument("--subscriptions", type=int, default=10)
+        parser.add_argument("--favorites", type=int, default=20)
+        parser.add_argument("--cart", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--clear", action='store_true')
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        self.batch_size = options["batch_size"]
+        if options["clear"]:
+            deleted, _ = User.objects.filter(
+                username__startswith=SEED_PREFIX
+            ).delete()
+            self.stdout.write(f'Removed {deleted} seeded objects')
+        with transaction.atomic():
+            self.load_reference_data()
+            users = self.seed_users(options["users"])
+            recipes = self.seed_recipes(
+                users, options["recipes"], options["ingredients"]
+            )
+            self.seed_relations(users, recipes, options)
+        self.rebuild_derived_data(users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users and {len(recipes)} recipes'
+        ))
+
+    def load_reference_data(self):
+        data_dir = os.path.join(settings.BASE_DIR, 'data')
+        if not Ingredient.objects.exists():
+            call_command(
+                'load_ingredients_json',
+                os.path.join(data_dir, 'ingredients.json'), verbosity=0
+            )
+        if not Tag.objects.exists():
+            call_command(
+                'load_tags_json', os.path.join(data_dir, 'tags.json'),
+                verbosity=0
+            )
+
+    def seed_users(self, count):
+        offset = User.objects.filter(username__startswith=SEED_PREFIX).count()
+        password = make_password(SEED_PASSWORD)
+        usernames = [
+            f'{SEED_PREFIX}{number}'
+            for number in range(offset, offset + count)
+        ]
+        User.objects.bulk_create(
+            (
+                User(
+                    username=username, email=f'{username}@example.com',
+                    first_name=random.choice(('Анна', 'Иван', 'Мария')),
+                    last_name=random.choice(('Петрова', 'Смирнов', 'Орлова')),
+                    password=password,
+                ) for username in usernames
+            ),
+            batch_size=self.batch_size
+        )
+        return list(User.objects.filter(
+            username__in=usernames
+        ).values_list('pk', flat=True))
+
+    def get_image_variants(self):
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (1280, 960), (200, 120, 60)).save(
+                buffer, 'JPEG'
+            )
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+        return build_image_variants(Recipe(image=SEED_IMAGE))
+
+    def seed_recipes(self, users, per_user, ingredients_count):
+        image_variants = self.get_image_variants()
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=user, image=SEED_IMAGE,
+                    image_variants=image_variants,
+                    name=' '.join(random.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(random.choices(WORDS, k=40)),
+                    cooking_time=random.randint(5, 180),
+                ) for user in users for _ in range(per_user)
+            ),
+            batch_size=self.batch_size
+        )
+        recipes = list(Recipe.objects.filter(
+            author_id__in=users
+        ).values_list('pk', flat=True))
+        tags = list(Tag.objects.values_list('pk', flat=True))
+        ingredients = list(Ingredient.objects.values_list('pk', flat=True))
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in random.sample(tags, random.randint(1, 2))
+            ),
+            batch_size=self.batch_size
+        )
+        IngredientRecipe.objects.bulk_create(
+            (
+                IngredientRecipe(
+                    recipe_id=recipe, ingredient_id=ingredient,
+                    amount=random.randint(1, 500)
+                )
+                for recipe in recipes
+                for ingredient in random.sample(
+                    ingredients, min(ingredients_count, len(ingredients))
+                )
+            ),
+            batch_size=self.batch_size
+        )
+        return recipes
+
+    def seed_relations(self, users, recipes, options):
+        Subscription.objects.bulk_create(
+            (
+                Subscription(subscriber_id=user, author_id=author)
+                for user in users
+                for author in random.sample(
+                    users, min(options["subscriptions"], len(users))
+                )
+                if author != user
+            ),
+            batch_size=self.batch_size, ignore_conflicts=True
+        )
+        for model, per_user in (
+            (Favorite, options["favorites"]), (ShoppingCart, options["cart"])
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user, recipe_id=recipe)
+                    for user in users
+                    for recipe in random.sample(
+                        recipes, min(per_user, len(recipes))
+                    )
+                ),
+                batch_size=self.batch_size, ignore_conflicts=True
+            )
+
+    def rebuild_derived_data(self, users):
+        call_command('reconcile_counters', verbosity=0)
+        shopping_list_changed.send(
+            sender=ShoppingListItem, user_ids=ShoppingListItem.rebuild(users)
+        )
+        update_search_index()
+        for subscriber, author in Subscription.objects.filter(
+            subscriber_id__in=users
+        ).values_list('subscriber_id', 'author_id').iterator():
+            FeedItem.backfill(subscriber, author)
+        for model in (Tag, Ingredient):
+            bump_cache_version(model)
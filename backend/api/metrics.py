@@ -0,0 +1,202 @@
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+TIMINGS = ('db', 'serializer', 'render', 'pdf')
+STATUS_CLASSES = (1, 2, 3, 4, 5)
+ENDPOINTS_KEY = 'metrics:endpoints'
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = Counter()
+        self.active = set()
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started
+
+    def get_server_timing(self):
+        entries = [
+            f'db;dur={self.timings["db"] * 1000:.1f};'
+            f'desc="{self.queries} queries"'
+        ]
+        entries += [
+            f'{name};dur={self.timings[name] * 1000:.1f}'
+            for name in TIMINGS[1:] if name in self.timings
+        ]
+        entries.append(f'total;dur={self.duration * 1000:.1f}')
+        return ', '.join(entries)
+
+
+@contextmanager
+def timer(name):
+    metrics = current_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+        metrics.active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.timings['db'] += time.perf_counter() - started
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def get_query_buckets():
+    return [str(bucket) for bucket in QUERY_BUCKETS] + ['+Inf']
+
+
+def get_query_bucket(queries):
+    for bucket in QUERY_BUCKETS:
+        if queries <= bucket:
+            return str(bucket)
+    return '+Inf'
+
+
+def write_metric(lines, metric, kind, help_text, samples):
+    lines.append(f'# HELP {metric} {help_text}')
+    lines.append(f'# TYPE {metric} {kind}')
+    for suffix, labels, value in samples:
+        label_text = ','.join(
+            f'{key}="{label}"' for key, label in labels.items()
+        )
+        lines.append(f'{metric}{suffix}{{{label_text}}} {value}')
+
+
+def get_metric_key(endpoint, name):
+    return f'metrics:{endpoint}:{name}'
+
+
+class MetricsAggregator:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.endpoints = set()
+        self.flushed = time.monotonic()
+
+    def add(self, endpoint, status_code, metrics):
+        duration = metrics.duration
+        with self.lock:
+            self.endpoints.add(endpoint)
+            self.pending[(endpoint, f'status_{status_code // 100}xx')] += 1
+            self.pending[(endpoint, 'queries')] += metrics.queries
+            self.pending[
+                (endpoint, f'queries_le_{get_query_bucket(metrics.queries)}')
+            ] += 1
+            self.pending[(endpoint, 'duration_us')] += int(duration * 1e6)
+            for name in TIMINGS:
+                self.pending[(endpoint, f'{name}_us')] += int(
+                    metrics.timings[name] * 1e6
+                )
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            endpoints = set(self.endpoints)
+            self.flushed = time.monotonic()
+        if not pending:
+            return
+        known = cache.get(ENDPOINTS_KEY, set())
+        if not endpoints <= known:
+            cache.set(ENDPOINTS_KEY, known | endpoints, None)
+        for (endpoint, name), value in pending.items():
+            key = get_metric_key(endpoint, name)
+            if cache.add(key, value, None):
+                continue
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                cache.set(key, value, None)
+
+    def render(self):
+        self.flush()
+        endpoints = sorted(cache.get(ENDPOINTS_KEY, set()))
+        names = [f'status_{code}xx' for code in STATUS_CLASSES]
+        names += ['queries', 'duration_us']
+        names += [f'{name}_us' for name in TIMINGS]
+        names += [f'queries_le_{bucket}' for bucket in get_query_buckets()]
+        values = cache.get_many([
+            get_metric_key(endpoint, name)
+            for endpoint in endpoints for name in names
+        ])
+
+        def get(endpoint, name):
+            return values.get(get_metric_key(endpoint, name), 0)
+
+        lines = []
+        write_metric(
+            lines, 'foodgram_requests_total', 'counter',
+            'Requests by endpoint and status class.',
+            (
+                ('', {'endpoint': endpoint, 'status': f'{code}xx'},
+                 get(endpoint, f'status_{code}xx'))
+                for endpoint in endpoints for code in STATUS_CLASSES
+                if get(endpoint, f'status_{code}xx')
+            )
+        )
+        for name, help_text in (
+            ('duration', 'Request processing time.'),
+            ('db', 'Time spent in SQL queries.'),
+            ('serializer', 'Time spent in serializers.'),
+            ('render', 'Time spent rendering responses.'),
+            ('pdf', 'Time spent building PDF files.'),
+        ):
+            write_metric(
+                lines, f'foodgram_{name}_seconds_total', 'counter', help_text,
+                (
+                    ('', {'endpoint': endpoint},
+                     get(endpoint, f'{name}_us') / 1e6)
+                    for endpoint in endpoints
+                )
+            )
+        samples = []
+        for endpoint in endpoints:
+            total = 0
+            for bucket in get_query_buckets():
+                total += get(endpoint, f'queries_le_{bucket}')
+                samples.append(
+                    ('_bucket', {'endpoint': endpoint, 'le': bucket}, total)
+                )
+            samples.append(('_sum', {'endpoint': endpoint},
+                            get(endpoint, 'queries')))
+            samples.append(('_count', {'endpoint': endpoint}, total))
+        write_metric(
+            lines, 'foodgram_queries_per_request', 'histogram',
+            'SQL queries per request.', samples
+        )
+        return '\n'.join(lines) + '\n'
+
+
+aggregator = MetricsAggregator()
@@ -0,0 +1,79 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from .db import get_replica_alias, pin_to_primary
+from .metrics import RequestMetrics, aggregator, current_metrics
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        user = getattr(request, 'user', None)
+        if (
+            get_replica_alias() is not None
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None and user.is_authenticated
+        ):
+            pin_to_primary(user)
+        return response
+
+
+def get_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = match.func
+    actions = getattr(view, 'actions', None)
+    if actions:
+        method = request.method.lower()
+        return f'{view.cls.__name__}.{actions.get(method, method)}'
+    if hasattr(view, 'cls'):
+        return view.cls.__name__
+    return match.view_name
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_response(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return await sync_to_async(self.process_response)(
+            request, response, metrics
+        )
+
+    def process_response(self, request, response, metrics):
+        aggregator.add(get_endpoint(request), response.status_code, metrics)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = metrics.get_server_timing()
+        return response
@@ -1,5 +1,17 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, urlencode
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.serializers import ValidationError
 
+from .cache import get_cache_version, get_etag
+from .db import (
+    get_replica_alias, is_pinned_to_primary, primary_reads, replica_reads,
+)
+from .metrics import timer
+
 
 class CommonSerializerMixin:
     def to_representation(self, instance):
@@ -18,14 +30,187 @@ class CommonSerializerMixin:
         return data
 
 
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timer('serializer'):
+            return super().to_representation(instance)
+
+
 class QuerySerializerMixin:
     PREFETCH_FIELDS = []
     RELATED_FIELDS = []
+    ANNOTATION_FIELDS = {}
+    DEFERRABLE_FIELDS = {}
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = None
+        if fields is None and omit is None:
+            return
+        readable = [
+            name for name, field in self.fields.items()
+            if not field.write_only
+        ]
+        for param, names in (('fields', fields), ('omit', omit)):
+            unknown = set(names or ()) - set(readable)
+            if unknown:
+                raise ValidationError({param: (
+                    f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+                )})
+        for name in readable:
+            if (
+                fields is not None and name not in fields
+                or omit is not None and name in omit
+            ):
+                self.fields.pop(name)
+        self.selected_fields = list(self.fields)
+
+    @classmethod
+    def get_field_source(cls, name):
+        field = cls._declared_fields.get(name)
+        return getattr(field, 'source', None) or name
 
     @classmethod
-    def get_related_queries(cls, queryset):
-        if cls.RELATED_FIELDS:
-            queryset = queryset.select_related(*cls.RELATED_FIELDS)
-        if cls.PREFETCH_FIELDS:
-            queryset = queryset.prefetch_related(*cls.PREFETCH_FIELDS)
+    def select_lookups(cls, lookups, fields):
+        if fields is None:
+            return lookups
+        sources = {cls.get_field_source(name) for name in fields}
+        return [
+            lookup for lookup in lookups
+            if lookup.split('__')[0] in sources
+        ]
+
+    @classmethod
+    def get_related_queries(cls, queryset, user=None, fields=None):
+        related_fields = cls.select_lookups(cls.RELATED_FIELDS, fields)
+        if related_fields:
+            queryset = queryset.select_related(*related_fields)
+        prefetch_fields = cls.select_lookups(cls.PREFETCH_FIELDS, fields)
+        if prefetch_fields:
+            queryset = queryset.prefetch_related(*prefetch_fields)
+        if user is not None and not user.is_anonymous:
+            annotations = {
+                name: annotation for name, annotation
+                in cls.get_viewer_annotations(user).items()
+                if fields is None
+                or cls.ANNOTATION_FIELDS.get(name, name) in fields
+            }
+            if annotations:
+                queryset = queryset.annotate(**annotations)
+        if fields is not None:
+            deferred = [
+                column for name, columns in cls.DEFERRABLE_FIELDS.items()
+                if name not in fields for column in columns
+            ]
+            if deferred:
+                queryset = queryset.defer(*deferred)
         return queryset
+
+    @classmethod
+    def get_viewer_annotations(cls, user):
+        return {}
+
+    @staticmethod
+    def get_viewer_flag(obj, name, queryset):
+        value = getattr(obj, name, None)
+        if value is None:
+            return queryset.exists()
+        return value
+
+
+class VersionedCacheMixin:
+    cache_query_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_path(self, request):
+        params = sorted(
+            (name, value.strip()) for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        )
+        return f'{request.path}?{urlencode(params)}'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not settings.CACHE_IS_SHARED:
+            return handler(request, *args, **kwargs)
+        version = get_cache_version(self.queryset.model)
+        etag = get_etag(
+            version, request.accepted_renderer.format,
+            self.get_cache_path(request)
+        )
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in [tag.replace('W/', '', 1) for tag in if_none_match]:
+            response = HttpResponseNotModified()
+        else:
+            cache_key = f'response:{etag}'
+            cached = cache.get(cache_key)
+            if cached is None:
+                with primary_reads():
+                    response = handler(request, *args, **kwargs)
+                response = self.finalize_response(
+                    request, response, *args, **kwargs
+                )
+                response.render()
+                if response.status_code != 200:
+                    return response
+                cached = (response.content, response['Content-Type'])
+                cache.set(
+                    cache_key, cached, settings.REFERENCE_CACHE_TIMEOUT
+                )
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+class ReplicaReadMixin:
+    replica_actions = None
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replica_reads.set(
+            get_replica_alias() is not None
+            and request.method in SAFE_METHODS
+            and (
+                self.replica_actions is None
+                or self.action in self.replica_actions
+            )
+            and not is_pinned_to_primary(request.user)
+        )
+
+
+class SparseFieldsetMixin:
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fieldset(self):
+        if (
+            self.action not in self.sparse_actions
+            or self.request.method not in SAFE_METHODS
+        ):
+            return {}
+        return {
+            param: [
+                name.strip() for name
+                in self.request.query_params[param].split(',')
+                if name.strip()
+            ]
+            for param in ('fields', 'omit')
+            if self.request.query_params.get(param)
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(
+            *args, **self.get_sparse_fieldset(), **kwargs
+        )
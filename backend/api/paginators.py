@@ -1,5 +1,141 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination,
+)
+from rest_framework.response import Response
 
 
 class PageNumberPaginationWithLimit(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class CursorPaginationWithLimit(CursorPagination):
+    ordering = ('-pub_date', 'id')
+    tiebreak_fields = ('pub_date', 'id')
+    page_size_query_param = 'limit'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def get_ordering(self, request, queryset, view):
+        filterset_class = getattr(view, 'filterset_class', None)
+        ordering_filter = filterset_class and filterset_class.base_filters.get(
+            self.ordering_query_param
+        )
+        param = request.query_params.get(self.ordering_query_param, '')
+        values = [value.strip() for value in param.split(',') if value.strip()]
+        if not ordering_filter or not values:
+            return self.ordering
+        ordering = [
+            ordering_filter.get_ordering_value(value) for value in values
+        ]
+        prefix = '-' if ordering[0].startswith('-') else ''
+        for field in self.tiebreak_fields:
+            if not any(name.lstrip('-') == field for name in ordering):
+                ordering.append(f'{prefix}{field}')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) not in (
+            '0', 'false'
+        ):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+
+class TimelinePagination(CursorPaginationWithLimit):
+    position_separator = '|'
+
+    def encode_position(self, row):
+        pub_date, recipe_id = row
+        return f'{pub_date.isoformat()}{self.position_separator}{recipe_id}'
+
+    def decode_position(self, position):
+        pub_date, _, recipe_id = position.rpartition(self.position_separator)
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None or not recipe_id.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, int(recipe_id)
+
+    def get_timeline_page(self, timeline, position, reverse):
+        ordering = ('pub_date', 'recipe_id')
+        if not reverse:
+            ordering = tuple(f'-{field}' for field in ordering)
+        if position is not None:
+            lookup = 'gt' if reverse else 'lt'
+            pub_date, recipe_id = position
+            timeline = timeline.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'recipe_id__{lookup}': recipe_id})
+            )
+        return list(timeline.order_by(*ordering)[:self.page_size + 1])
+
+    def paginate_timelines(self, timelines, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.count = None
+        if request.query_params.get(self.count_query_param) not in (
+            '0', 'false'
+        ):
+            self.count = sum(timeline.count() for timeline in timelines)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = None
+        if self.cursor is not None:
+            position = self.decode_position(self.cursor.position)
+
+        rows = sorted(
+            (
+                row for timeline in timelines
+                for row in self.get_timeline_page(timeline, position, reverse)
+            ),
+            reverse=not reverse
+        )[:self.page_size + 1]
+        has_following = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_following if not reverse else position is not None
+        self.has_previous = (
+            has_following if reverse else position is not None
+        )
+        self.next_position = self.previous_position = self.cursor and (
+            self.cursor.position
+        )
+        if rows:
+            self.next_position = self.encode_position(rows[-1])
+            self.previous_position = self.encode_position(rows[0])
+        return [recipe_id for _, recipe_id in rows]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(0, False, self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(0, True, self.previous_position))
@@ -1,4 +1,5 @@
-
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
 
@@ -7,3 +8,11 @@ class IsAuthorOrReadOnlyOrAdmin(permissions.BasePermission):
         return (request.method in permissions.SAFE_METHODS
                 or obj.author == request.user
                 or request.user.is_superuser)
+
+
+class IsMetricsScraper(permissions.BasePermission):
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return request.user.is_staff or bool(token) and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
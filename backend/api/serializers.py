@@ -1,25 +1,47 @@
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.validators import MinValueValidator
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import (
+    Exists, OuterRef, Prefetch, Subquery, prefetch_related_objects,
+)
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework.serializers import (
-    IntegerField, ModelSerializer, PrimaryKeyRelatedField,
-    SerializerMethodField, SlugRelatedField, ValidationError,
+    IntegerField, ListField, ListSerializer, ModelSerializer,
+    PrimaryKeyRelatedField, Serializer, SerializerMethodField,
+    SlugRelatedField, ValidationError,
 )
 from rest_framework.validators import UniqueTogetherValidator
 
-from .mixins import CommonSerializerMixin, QuerySerializerMixin
+from .cache import build_once, get_cache_version, get_cache_versions
+from .db import primary_reads, replica_reads
+from .mixins import (
+    CommonSerializerMixin, QuerySerializerMixin, TimedSerializerMixin,
+)
 from ingredients.models import Ingredient
+from jobs.models import Job
 from recipes.models import Favorite, IngredientRecipe, Recipe, ShoppingCart
+from recipes.signals import (
+    defer_shopping_list_updates, get_cart_users, update_shopping_lists,
+)
 from tags.models import Tag
 from users.models import Subscription
 
 User = get_user_model()
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(
+    TimedSerializerMixin, QuerySerializerMixin, UserSerializer
+):
+    DEFERRABLE_FIELDS = {
+        'email': ('email',),
+        'first_name': ('first_name',),
+        'last_name': ('last_name',),
+    }
+
     is_subscribed = SerializerMethodField(method_name='get_is_subscribed')
 
     class Meta:
@@ -36,28 +58,38 @@ class CustomUserSerializer(UserSerializer):
         read_only_fields = ('id',)
         extra_kwargs = {'password': {'write_only': True, 'min_length': 8}}
 
+    @classmethod
+    def get_viewer_annotations(cls, user):
+        return {
+            'is_subscribed': Exists(Subscription.objects.filter(
+                author=OuterRef('pk'), subscriber=user
+            ))
+        }
+
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
-        return not request.user.is_anonymous and Subscription.objects.filter(
-            author=obj, subscriber=request.user
-        ).exists()
+        return not request.user.is_anonymous and self.get_viewer_flag(
+            obj, 'is_subscribed', Subscription.objects.filter(
+                author=obj, subscriber=request.user
+            )
+        )
 
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
         read_only_fields = ('__all__',)
 
 
-class IngredientSerializer(ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Ingredient
         fields = '__all__'
         read_only_fields = ('__all__',)
 
 
-class RecipeShortSerializer(ModelSerializer):
+class RecipeShortSerializer(TimedSerializerMixin, ModelSerializer):
     image = SerializerMethodField(read_only=True, method_name='get_image')
 
     class Meta:
@@ -66,7 +98,7 @@ class RecipeShortSerializer(ModelSerializer):
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
     def get_image(self, obj):
-        return obj.image.url
+        return obj.get_image_url('thumbnail')
 
 
 class FavoriteSerializer(CommonSerializerMixin, ModelSerializer):
@@ -87,9 +119,18 @@ class ShoppingCartSerializer(CommonSerializerMixin, ModelSerializer):
         read_only_fields = ('recipe', 'user')
 
 
-class CustomExtendedUserSerializer(QuerySerializerMixin, CustomUserSerializer):
-    PREFETCH_FIELDS = ['recipes']
+class RecipeBatchSerializer(Serializer):
+    recipes = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.RECIPE_BATCH_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
 
+
+class CustomExtendedUserSerializer(CustomUserSerializer):
     recipes = SerializerMethodField(read_only=True, method_name='get_recipes')
     recipes_count = IntegerField(read_only=True,)
 
@@ -106,15 +147,34 @@ class CustomExtendedUserSerializer(QuerySerializerMixin, CustomUserSerializer):
             'recipes',
         )
 
+    @classmethod
+    def get_related_queries(
+        cls, queryset, user=None, recipes_limit=None, fields=None
+    ):
+        queryset = super().get_related_queries(queryset, user, fields)
+        if fields is not None and 'recipes' not in fields:
+            return queryset
+        recipes = Recipe.objects.order_by('-pub_date')
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date').values('pk')[:recipes_limit]
+            ))
+        return queryset.prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
+
+    @staticmethod
+    def get_recipes_limit(request):
+        recipes_limit = request.query_params.get('recipes_limit', '')
+        return int(recipes_limit) if recipes_limit.isdigit() else None
+
     def get_recipes(self, obj):
-        recipes = obj.recipes.all()
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = recipes_limit and recipes[:int(recipes_limit)] or recipes
-        return RecipeShortSerializer(recipes, many=True).data
+        return RecipeShortSerializer(obj.limited_recipes, many=True).data
 
 
-class SubscriptionSerializer(ModelSerializer):
+class SubscriptionSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Subscription
         fields = ('author', 'subscriber')
@@ -138,8 +198,11 @@ class SubscriptionSerializer(ModelSerializer):
         queryset = User.objects.filter(
             subscriptions_author__author=instance.author,
             subscriptions_author__subscriber=request.user
-        ).annotate(recipes_count=Count('recipes__id'))
-        queryset = CustomExtendedUserSerializer.get_related_queries(queryset)
+        )
+        queryset = CustomExtendedUserSerializer.get_related_queries(
+            queryset, request.user,
+            CustomExtendedUserSerializer.get_recipes_limit(request)
+        )
         context = {'request': request}
         return CustomExtendedUserSerializer(queryset[0], context=context).data
 
@@ -158,30 +221,26 @@ class IngredientRecipeReadSerializer(ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class IngredientRecipeSerializer(ModelSerializer):
-    id = PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(), source='ingredient'
-    )
-    amount = IntegerField(
-        validators=(
-            MinValueValidator(1, message='Значение не может быть меньше 1.'),)
-    )
+class RecipeListSerializer(TimedSerializerMixin, ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, 'all') else data)
+        self.child.load_fragments(recipes)
+        return super().to_representation(recipes)
 
-    class Meta:
-        model = IngredientRecipe
-        fields = ('id', 'recipe', 'amount')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=IngredientRecipe.objects.all(),
-                fields=('id', 'recipe'),
-                message='Дублирование записи.'
-            )
-        ]
 
-
-class RecipeReadSerializer(QuerySerializerMixin, ModelSerializer):
-    PREFETCH_FIELDS = ['tags', 'ingredient_recipe']
+class RecipeReadSerializer(
+    TimedSerializerMixin, QuerySerializerMixin, ModelSerializer
+):
+    FRAGMENT_PREFETCH_FIELDS = ['tags', 'ingredient_recipe__ingredient']
     RELATED_FIELDS = ['author']
+    ANNOTATION_FIELDS = {'is_subscribed_author': 'author'}
+    DEFERRABLE_FIELDS = {
+        'name': ('name',),
+        'image': ('image', 'image_variants'),
+        'text': ('text',),
+        'cooking_time': ('cooking_time',),
+    }
+    VIEWER_FIELDS = ('is_favorited', 'is_in_shopping_cart')
 
     tags = TagSerializer(many=True)
     author = CustomUserSerializer()
@@ -210,24 +269,163 @@ class RecipeReadSerializer(QuerySerializerMixin, ModelSerializer):
             'text',
             'cooking_time'
         )
+        list_serializer_class = RecipeListSerializer
+
+    @classmethod
+    def get_viewer_annotations(cls, user):
+        return {
+            'is_favorited': Exists(Favorite.objects.filter(
+                recipe=OuterRef('pk'), user=user
+            )),
+            'is_in_shopping_cart': Exists(ShoppingCart.objects.filter(
+                recipe=OuterRef('pk'), user=user
+            )),
+            'is_subscribed_author': Exists(Subscription.objects.filter(
+                author=OuterRef('author'), subscriber=user
+            )),
+        }
+
+    def to_representation(self, instance):
+        is_subscribed = getattr(instance, 'is_subscribed_author', None)
+        if is_subscribed is not None:
+            instance.author.is_subscribed = is_subscribed
+        fragment = self.get_fragment(instance)
+        data = OrderedDict()
+        for field_name in self.fields:
+            if field_name == 'is_favorited':
+                data[field_name] = self.get_is_favorited(instance)
+            elif field_name == 'is_in_shopping_cart':
+                data[field_name] = self.get_is_in_shopping_cart(instance)
+            else:
+                data[field_name] = fragment[field_name]
+        if 'author' in data:
+            data['author'] = OrderedDict(
+                data['author'],
+                is_subscribed=self.fields['author'].get_is_subscribed(
+                    instance.author
+                )
+            )
+        return data
+
+    def get_fragment_key(self, pk, version):
+        key = f'recipe_fragment:{pk}:{version}:{self.get_image_variant()}'
+        if self.selected_fields is not None:
+            key = f'{key}:' + ','.join(
+                name for name in self.selected_fields
+                if name not in self.VIEWER_FIELDS
+            )
+        return key
+
+    def load_fragments(self, instances):
+        self.fragment_keys = {}
+        self.fragments = {}
+        if settings.CACHE_IS_SHARED:
+            versions = get_cache_versions(
+                Recipe, [instance.pk for instance in instances]
+            )
+            self.fragment_keys = {
+                pk: self.get_fragment_key(pk, version)
+                for pk, version in versions.items()
+            }
+            fragments = cache.get_many(self.fragment_keys.values())
+            self.fragments = {
+                pk: fragments[key] for pk, key in self.fragment_keys.items()
+                if key in fragments
+            }
+        misses = [
+            instance for instance in instances
+            if instance.pk not in self.fragments
+        ]
+        self.fragment_sources = {}
+        if settings.CACHE_IS_SHARED and misses and replica_reads.get():
+            with primary_reads():
+                self.fragment_sources = Recipe.objects.select_related(
+                    'author'
+                ).in_bulk([instance.pk for instance in misses])
+                self.prefetch_fragments(list(self.fragment_sources.values()))
+            return
+        self.prefetch_fragments(misses)
+
+    def prefetch_fragments(self, instances):
+        lookups = self.select_lookups(
+            self.FRAGMENT_PREFETCH_FIELDS, self.selected_fields
+        )
+        if instances and lookups:
+            prefetch_related_objects(instances, *lookups)
+
+    def get_fragment(self, instance):
+        fragment = getattr(self, 'fragments', {}).get(instance.pk)
+        if fragment is not None:
+            return fragment
+        key = getattr(self, 'fragment_keys', {}).get(instance.pk)
+        if key is None:
+            key = self.get_fragment_key(
+                instance.pk, get_cache_version(Recipe, instance.pk)
+            )
+        from_replica = replica_reads.get()
+        return build_once(
+            key, lambda: self.build_fragment(
+                self.get_fragment_source(instance, from_replica)
+            ),
+            settings.RECIPE_FRAGMENT_TIMEOUT
+        )
+
+    def get_fragment_source(self, instance, from_replica):
+        source = getattr(self, 'fragment_sources', {}).get(instance.pk)
+        if source is None and from_replica:
+            source = Recipe.objects.select_related('author').filter(
+                pk=instance.pk
+            ).first()
+        if source is None:
+            return instance
+        if Recipe.author.field.is_cached(instance):
+            source.author.is_subscribed = getattr(
+                instance.author, 'is_subscribed', None
+            )
+        return source
+
+    def build_fragment(self, instance):
+        self.prefetch_fragments([instance])
+        fragment = {
+            field.field_name: field.to_representation(
+                field.get_attribute(instance)
+            )
+            for field in self._readable_fields
+            if field.field_name not in self.VIEWER_FIELDS
+        }
+        if 'author' in fragment:
+            fragment['author'].pop('is_subscribed')
+        return fragment
+
+    def get_image_variant(self):
+        view = self.context.get('view')
+        if view is not None and view.action in ('list', 'feed'):
+            return 'card'
+        return None
 
     def get_image(self, obj):
-        return obj.image.url
+        return obj.get_image_url(self.get_image_variant())
 
     def get_is_favorited(self, obj):
         request = self.context['request']
-        return not request.user.is_anonymous and Favorite.objects.filter(
-            recipe=obj, user=request.user
-        ).exists()
+        return not request.user.is_anonymous and self.get_viewer_flag(
+            obj, 'is_favorited', Favorite.objects.filter(
+                recipe=obj, user=request.user
+            )
+        )
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context['request']
-        return not request.user.is_anonymous and ShoppingCart.objects.filter(
-            recipe=obj, user=request.user
-        ).exists()
+        return not request.user.is_anonymous and self.get_viewer_flag(
+            obj, 'is_in_shopping_cart', ShoppingCart.objects.filter(
+                recipe=obj, user=request.user
+            )
+        )
 
 
-class RecipeSerializer(QuerySerializerMixin, ModelSerializer):
+class RecipeSerializer(
+    TimedSerializerMixin, QuerySerializerMixin, ModelSerializer
+):
     image = Base64ImageField()
     tags = PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
@@ -250,7 +448,7 @@ class RecipeSerializer(QuerySerializerMixin, ModelSerializer):
         ingredients = self.validate_m2m_field(
             self.initial_data, 'ingredients'
         )
-        data['ingredients'] = self.validate_empty_field(ingredients, 'amount')
+        data['ingredients'] = self.validate_ingredients(ingredients)
         data['tags'] = self.validate_m2m_field(self.initial_data, 'tags')
         return data
 
@@ -277,14 +475,26 @@ class RecipeSerializer(QuerySerializerMixin, ModelSerializer):
         return data
 
     @staticmethod
-    def validate_empty_field(data, field_name):
-        if len(
-            [item[field_name] for item in data if not int(item[field_name])]
-        ):
+    def validate_ingredients(ingredients):
+        amounts = {}
+        for item in ingredients:
+            try:
+                amounts[int(item['id'])] = int(item['amount'])
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError(
+                    'Некорректное значение в поле "ingredients"'
+                )
+        if any(amount < 1 for amount in amounts.values()):
+            raise ValidationError('Значение не может быть меньше 1.')
+
+        missing = set(amounts) - set(Ingredient.objects.filter(
+            pk__in=amounts
+        ).values_list('pk', flat=True))
+        if missing:
             raise ValidationError(
-                f'Пустое значение в поле "{field_name}"'
+                f'Ингредиенты не существуют: {sorted(missing)}'
             )
-        return data
+        return amounts
 
     @transaction.atomic
     def create(self, validated_data):
@@ -293,35 +503,67 @@ class RecipeSerializer(QuerySerializerMixin, ModelSerializer):
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(author=user, **validated_data)
         recipe.tags.set(tags)
-        self.validate_save_ingredients(ingredients, recipe)
+        self.save_ingredients(ingredients, recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        self.validate_save_ingredients(
-            ingredients, instance, is_update=True
-        )
+        self.save_ingredients(ingredients, instance, is_update=True)
         instance.tags.set(tags)
         return super().update(instance, validated_data)
 
     @staticmethod
-    def validate_save_ingredients(ingredients, recipe, is_update=False):
-        for item in ingredients:
-            item.update({'recipe': recipe.id})
+    def save_ingredients(amounts, recipe, is_update=False):
+        current = {}
+        if is_update:
+            current = {
+                item.ingredient_id: item
+                for item in IngredientRecipe.objects.filter(recipe=recipe)
+            }
+        changes = {
+            ingredient: amounts.get(ingredient, 0) - item.amount
+            for ingredient, item in current.items()
+        }
+        created = []
+        for ingredient, amount in amounts.items():
+            if ingredient not in current:
+                changes[ingredient] = amount
+                created.append(IngredientRecipe(
+                    recipe=recipe, ingredient_id=ingredient, amount=amount
+                ))
+        updated = []
+        for ingredient, item in current.items():
+            if ingredient in amounts and changes[ingredient]:
+                item.amount = amounts[ingredient]
+                updated.append(item)
+        deleted = [
+            item.pk for ingredient, item in current.items()
+            if ingredient not in amounts
+        ]
 
-        nested_ingredients_serializer = IngredientRecipeSerializer(
-            data=ingredients, many=True
-        )
+        with defer_shopping_list_updates():
+            IngredientRecipe.objects.bulk_create(created)
+            IngredientRecipe.objects.bulk_update(updated, ('amount',))
+            IngredientRecipe.objects.filter(pk__in=deleted).delete()
         if is_update:
-            IngredientRecipeSerializer.Meta.model.objects.filter(
-                recipe=recipe.id
-            ).delete()
-        nested_ingredients_serializer.is_valid(raise_exception=True)
-        nested_ingredients_serializer.save()
+            update_shopping_lists(get_cart_users(recipe.id), changes)
 
     def to_representation(self, instance):
         request = self.context['request']
         context = {'request': request}
+        instance = RecipeReadSerializer.get_related_queries(
+            Recipe.objects.filter(pk=instance.pk), request.user
+        ).get()
         return RecipeReadSerializer(instance, context=context).data
+
+
+class JobSerializer(TimedSerializerMixin, ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'name', 'status', 'attempts', 'result', 'error',
+            'created', 'updated'
+        )
+        read_only_fields = fields
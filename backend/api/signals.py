@@ -0,0 +1,162 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import evict_tokens, evict_user_tokens
+from .cache import bump_cache_version, bump_cache_versions
+from .db import close_unusable_connections
+from .loaders import bulk_loaded
+from .metrics import install_query_recorder
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe, ShoppingCart
+from recipes.signals import shopping_list_changed
+from tags.models import Tag
+from users.models import users_updated
+
+User = get_user_model()
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver(request_started)
+def check_db_connections(sender, **kwargs):
+    close_unusable_connections()
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_reference_version(sender, **kwargs):
+    bump_cache_version(sender)
+
+
+@receiver(shopping_list_changed)
+def bump_shoping_cart_version(sender, user_ids, **kwargs):
+    for user_id in user_ids:
+        bump_cache_version(ShoppingCart, user_id)
+
+
+def bump_ingredients_carts_version(ingredient_ids):
+    users = ShoppingCart.objects.filter(
+        recipe__ingredient_recipe__ingredient__in=ingredient_ids
+    ).values_list('user_id', flat=True).distinct()
+    for user_id in users:
+        bump_cache_version(ShoppingCart, user_id)
+
+
+def bump_ingredients_recipes_version(ingredient_ids):
+    bump_cache_versions(Recipe, Recipe.objects.filter(
+        ingredient_recipe__ingredient__in=ingredient_ids
+    ).values_list('pk', flat=True))
+
+
+def bump_tags_recipes_version(tag_ids):
+    bump_cache_versions(Recipe, Recipe.objects.filter(
+        tags__in=tag_ids
+    ).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Ingredient)
+def bump_ingredient_carts_version(sender, instance, **kwargs):
+    bump_ingredients_carts_version([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def bump_recipe_version(sender, instance, **kwargs):
+    bump_cache_version(Recipe, instance.pk)
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def bump_ingredient_recipe_version(sender, instance, **kwargs):
+    bump_cache_version(Recipe, instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_tags_version(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_cache_version(Recipe, instance.pk)
+    elif pk_set:
+        bump_cache_versions(Recipe, pk_set)
+    else:
+        bump_cache_versions(Recipe, instance.recipes.values_list(
+            'pk', flat=True
+        ))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tag_recipes_version(sender, instance, **kwargs):
+    bump_tags_recipes_version([instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def bump_ingredient_recipes_version(sender, instance, **kwargs):
+    bump_ingredients_recipes_version([instance.pk])
+
+
+@receiver(bulk_loaded, sender=Tag)
+def bump_loaded_tags_versions(sender, pks, **kwargs):
+    bump_tags_recipes_version(pks)
+
+
+@receiver(bulk_loaded, sender=Ingredient)
+def bump_loaded_ingredients_versions(sender, pks, **kwargs):
+    bump_ingredients_carts_version(pks)
+    bump_ingredients_recipes_version(pks)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(sender, instance, update_fields=None, **kwargs):
+    fields = [
+        field for field in AUTHOR_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    instance.previous_author_fields = (
+        fields and not instance._state.adding
+        and User.objects.filter(pk=instance.pk).values(*fields).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipes_version(sender, instance, **kwargs):
+    previous = getattr(instance, 'previous_author_fields', None)
+    if not previous or all(
+        getattr(instance, field) == value for field, value in previous.items()
+    ):
+        return
+    bump_cache_versions(Recipe, instance.recipes.values_list(
+        'pk', flat=True
+    ))
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    evict_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def evict_changed_user_tokens(sender, instance, update_fields=None,
+                              **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    evict_user_tokens([instance.pk])
+
+
+@receiver(users_updated, sender=User)
+def evict_updated_users_tokens(sender, pks, **kwargs):
+    evict_user_tokens(pks)
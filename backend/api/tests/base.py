@@ -0,0 +1,87 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe
+from tags.models import Tag
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def get_image_content(color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def get_image_data(color='red'):
+    content = base64.b64encode(get_image_content(color)).decode()
+    return f'data:image/png;base64,{content}'
+
+
+class APITestMixin:
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        self.author = self.create_user('author')
+        self.user = self.create_user('user')
+        self.client = self.get_client(self.user)
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            email=f'{username}@example.com', username=username,
+            first_name=username, last_name=username, password='pass-12345'
+        )
+
+    @staticmethod
+    def get_client(user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def create_recipe(self, author=None, name='Блины', amount=100, **kwargs):
+        recipe = Recipe.objects.create(
+            author=author or self.author, name=name, text='Рецепт',
+            cooking_time=10, image=SimpleUploadedFile(
+                'recipe.png', get_image_content(), 'image/png'
+            ), **kwargs
+        )
+        recipe.tags.add(self.tag)
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=self.ingredient, amount=amount
+        )
+        return recipe
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, JOBS_SYNC=True)
+class APITestCase(APITestMixin, TestCase):
+    pass
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, JOBS_SYNC=True)
+class APITransactionTestCase(APITestMixin, TransactionTestCase):
+    pass
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .base import APITestCase
+from api.authentication import (
+    get_cached_user, get_token_cache_key, local_users,
+)
+from users.models import User
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class TokenCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.key = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def test_only_auth_fields_are_cached(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.assertEqual(
+            cache.get(get_token_cache_key(self.key)),
+            (self.user.pk, True, False, False)
+        )
+
+    def test_deferred_fields_are_loaded_together(self):
+        self.client.get('/api/users/me/')
+        user = get_cached_user(self.key)
+        self.assertEqual(
+            (user.pk, user.is_active, user.is_staff, user.is_superuser),
+            (self.user.pk, True, False, False)
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                (user.email, user.username, user.password),
+                (self.user.email, self.user.username, self.user.password)
+            )
+
+    def test_queryset_update_evicts_tokens(self):
+        self.client.get('/api/users/me/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(cache.get(get_token_cache_key(self.key)))
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_stale_auth_fields_are_not_written_back(self):
+        self.client.get('/api/users/me/')
+        user = get_cached_user(self.key)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        user.first_name = 'Новое'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Новое')
+        self.assertTrue(self.user.is_staff)
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_process_local_cache_is_not_used(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.assertIsNone(cache.get(get_token_cache_key(self.key)))
+        self.assertEqual(get_cached_user(self.key).pk, self.user.pk)
+        local_users.delete(self.key)
+        self.assertIsNone(get_cached_user(self.key))
@@ -0,0 +1,60 @@
+from .base import APITestCase
+from recipes.models import Favorite, ShoppingCart, ShoppingListItem
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_recipe(name='Первый', amount=100)
+        self.second = self.create_recipe(name='Второй', amount=50)
+
+    def post(self, url, ids):
+        return self.client.post(url, {'recipes': ids}, format='json').json()
+
+    def delete(self, url, ids):
+        return self.client.delete(url, {'recipes': ids}, format='json').json()
+
+    def test_favorites_are_counted_once(self):
+        Favorite.objects.create(user=self.user, recipe=self.first)
+        ids = [self.first.pk, self.second.pk, 999]
+        self.assertEqual(self.post('/api/recipes/favorite/', ids), {
+            'results': {
+                str(self.first.pk): 'exists',
+                str(self.second.pk): 'created',
+                '999': 'not_found',
+            }
+        })
+        self.post('/api/recipes/favorite/', ids)
+        for recipe in (self.first, self.second):
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.favorites_count, 1)
+
+        self.delete('/api/recipes/favorite/', ids)
+        self.assertEqual(self.delete('/api/recipes/favorite/', ids), {
+            'results': {
+                str(self.first.pk): 'not_found',
+                str(self.second.pk): 'not_found',
+                '999': 'not_found',
+            }
+        })
+        for recipe in (self.first, self.second):
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.favorites_count, 0)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_shopping_list_is_changed_once(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.first)
+        ids = [self.first.pk, self.second.pk]
+        self.post('/api/recipes/shopping_cart/', ids)
+        self.post('/api/recipes/shopping_cart/', ids)
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 150
+        )
+        self.delete('/api/recipes/shopping_cart/', [self.second.pk])
+        self.delete('/api/recipes/shopping_cart/', [self.second.pk])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 100
+        )
+        self.delete('/api/recipes/shopping_cart/', ids)
+        self.assertFalse(ShoppingListItem.objects.exists())
+        self.assertFalse(ShoppingCart.objects.exists())
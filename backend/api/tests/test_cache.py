@@ -0,0 +1,142 @@
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .base import APITestCase, APITransactionTestCase
+from api.cache import get_cache_version
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+
+
+class VersionedCacheTests(APITestCase):
+    def test_process_local_cache_serves_fresh_data(self):
+        self.client.get('/api/tags/')
+        Tag.objects.filter(pk=self.tag.pk).update(name='Ужин')
+        response = self.client.get('/api/tags/')
+        self.assertNotIn('ETag', response)
+        self.assertEqual(response.json()[0]['name'], 'Ужин')
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_shared_cache_answers_not_modified(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.tag.name = 'Ужин'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.save()
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'Ужин')
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_cached_responses_vary_on_accept(self):
+        for _ in range(2):
+            response = self.client.get('/api/tags/')
+            self.assertEqual(response['Vary'], 'Accept')
+        response = self.client.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], 'Accept')
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_unknown_query_params_share_cache_entry(self):
+        Ingredient.objects.create(name='молоко', measurement_unit='мл')
+        etag = self.client.get('/api/ingredients/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/ingredients/?random=1')['ETag'], etag
+        )
+        response = self.client.get('/api/ingredients/?name=мол')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            [item['name'] for item in response.json()], ['молоко']
+        )
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class RecipeVersionTests(APITransactionTestCase):
+    def test_version_is_bumped_after_commit(self):
+        recipe = self.create_recipe()
+        version = get_cache_version(Recipe, recipe.pk)
+        with transaction.atomic():
+            recipe.name = 'Оладьи'
+            recipe.save()
+            self.assertEqual(get_cache_version(Recipe, recipe.pk), version)
+        self.assertNotEqual(get_cache_version(Recipe, recipe.pk), version)
+
+    def test_update_response_is_not_served_from_stale_fragment(self):
+        recipe = self.create_recipe()
+        client = self.get_client(self.author)
+        url = f'/api/recipes/{recipe.pk}/'
+        self.assertEqual(client.get(url).json()['name'], 'Блины')
+        response = client.patch(url, {
+            'name': 'Оладьи',
+            'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 200}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['name'], 'Оладьи')
+        self.assertEqual(
+            response.json()['ingredients'][0]['amount'], 200
+        )
+        self.assertEqual(client.get(url).json()['name'], 'Оладьи')
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class RecipeFragmentTests(APITestCase):
+    def test_warm_page_skips_prefetches(self):
+        for name in ('Блины', 'Оладьи', 'Сырники'):
+            self.create_recipe(name=name)
+        client = self.get_client()
+        with self.assertNumQueries(5):
+            cold = client.get('/api/recipes/').json()
+        with self.assertNumQueries(2):
+            warm = client.get('/api/recipes/').json()
+        self.assertEqual(warm, cold)
+        self.assertEqual(len(warm['results'][0]['ingredients']), 1)
+
+    def test_only_missing_fragments_are_prefetched(self):
+        recipe = self.create_recipe()
+        client = self.get_client()
+        client.get('/api/recipes/')
+        missing = self.create_recipe(name='Оладьи')
+        with CaptureQueriesContext(connection) as queries:
+            results = client.get('/api/recipes/').json()['results']
+        prefetches = [
+            query['sql'] for query in queries.captured_queries
+            if 'recipes_recipe_tags' in query['sql']
+        ]
+        self.assertEqual(len(prefetches), 1)
+        self.assertIn(f'IN ({missing.pk})', prefetches[0])
+        self.assertEqual(
+            [item['name'] for item in results], ['Оладьи', recipe.name]
+        )
+        self.assertEqual(results[0]['tags'][0]['slug'], self.tag.slug)
+
+
+class AuthorVersionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe()
+        self.version = get_cache_version(Recipe, self.recipe.pk)
+
+    def save_author(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save(**kwargs)
+        return get_cache_version(Recipe, self.recipe.pk) != self.version
+
+    def test_login_keeps_recipe_versions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.get_client().post('/api/auth/token/login/', {
+                'email': self.author.email, 'password': 'pass-12345'
+            })
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            get_cache_version(Recipe, self.recipe.pk), self.version
+        )
+        self.assertFalse(self.save_author())
+
+    def test_renamed_author_bumps_recipe_versions(self):
+        self.author.first_name = 'Иван'
+        self.assertTrue(self.save_author(update_fields=['first_name']))
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .base import APITestCase
+from recipes.models import FeedItem, Recipe
+from tags.models import Tag
+from users.models import Subscription
+
+
+@override_settings(FEED_FANOUT_LIMIT=1)
+class FeedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.celebrity = self.create_user('celebrity')
+        self.stranger = self.create_user('stranger')
+        now = timezone.now()
+        recipes = []
+        for number, author in enumerate(
+            (self.author, self.celebrity, self.stranger) * 3
+        ):
+            recipe = self.create_recipe(author=author, name=f'Рецепт {number}')
+            recipes.append(recipe)
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(hours=number // 2)
+            )
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+        Subscription.objects.create(
+            subscriber=self.user, author=self.celebrity
+        )
+        Subscription.objects.create(
+            subscriber=self.stranger, author=self.celebrity
+        )
+        self.expected = list(Recipe.objects.filter(
+            author__in=(self.author, self.celebrity)
+        ).order_by('-pub_date', '-pk').values_list('name', flat=True))
+
+    def walk(self, url, direction='next'):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([recipe['name'] for recipe in data['results']])
+            url = data[direction]
+        return pages, data
+
+    def test_pulled_author_is_merged_with_timeline(self):
+        self.assertEqual(FeedItem.get_pulled_authors(self.user), [
+            self.celebrity.pk
+        ])
+        pages, data = self.walk('/api/recipes/feed/?limit=4')
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(page) for page in pages], [4, 2])
+        self.assertEqual(data['count'], len(self.expected))
+
+    def test_previous_links_walk_back(self):
+        url = '/api/recipes/feed/?limit=2'
+        data = self.client.get(url).json()
+        self.assertIsNone(data['previous'])
+        while data['next']:
+            data = self.client.get(data['next']).json()
+        pages, data = self.walk(data['previous'], 'previous')
+        self.assertEqual(sum(reversed(pages), []), self.expected[:-2])
+        self.assertIsNone(data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/feed/?cursor=bad')
+        self.assertEqual(response.status_code, 404)
+
+    def test_filtered_feed_uses_recipe_queryset(self):
+        other_tag = Tag.objects.create(
+            name='Обед', color='#49B64E', slug='lunch'
+        )
+        recipe = Recipe.objects.get(name='Рецепт 1')
+        recipe.tags.set([other_tag])
+        data = self.client.get(
+            '/api/recipes/feed/?tags=lunch&limit=10'
+        ).json()
+        self.assertEqual(
+            [recipe['name'] for recipe in data['results']], ['Рецепт 1']
+        )
+
+    def test_recipes_are_pushed_when_author_drops_to_limit(self):
+        recipe = self.create_recipe(author=self.celebrity, name='Новый')
+        self.assertFalse(FeedItem.objects.filter(recipe=recipe).exists())
+        Subscription.objects.filter(
+            subscriber=self.stranger, author=self.celebrity
+        ).delete()
+        self.assertEqual(FeedItem.get_pulled_authors(self.user), [])
+        self.assertEqual(list(FeedItem.objects.filter(
+            recipe=recipe
+        ).values_list('user_id', flat=True)), [self.user.pk])
+        pages, _ = self.walk('/api/recipes/feed/?limit=20')
+        self.assertEqual(pages[0], ['Новый'] + self.expected)
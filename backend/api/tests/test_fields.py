@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base import APITestCase
+from users.models import Subscription
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.create_recipe()
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), ' '.join(
+            query['sql'] for query in queries.captured_queries
+        )
+
+    def test_fields_prune_recipe_queries(self):
+        data, sql = self.get('/api/recipes/?fields=id,name,is_favorited')
+        self.assertCountEqual(
+            data['results'][0], ['id', 'name', 'is_favorited']
+        )
+        for fragment in (
+            'recipes_recipe_tags', 'recipes_ingredientrecipe',
+            '"recipes_recipe"."text"', '"recipes_recipe"."image"',
+            'is_in_shopping_cart', 'users_subscription', 'users_user',
+        ):
+            with self.subTest(fragment=fragment):
+                self.assertNotIn(fragment, sql)
+        self.assertIn('is_favorited', sql)
+
+    def test_omit_prunes_recipe_queries(self):
+        data, sql = self.get(
+            f'/api/recipes/{self.recipe.pk}/?omit=text,ingredients,tags'
+        )
+        self.assertNotIn('text', data)
+        self.assertIn('author', data)
+        for fragment in (
+            'recipes_recipe_tags', 'recipes_ingredientrecipe',
+            '"recipes_recipe"."text"',
+        ):
+            with self.subTest(fragment=fragment):
+                self.assertNotIn(fragment, sql)
+        self.assertIn('users_subscription', sql)
+
+    def test_fields_prune_user_queries(self):
+        data, sql = self.get('/api/users/?fields=id,username')
+        self.assertCountEqual(data['results'][0], ['id', 'username'])
+        self.assertNotIn('"users_user"."email"', sql)
+        self.assertNotIn('users_subscription', sql)
+        data, sql = self.get('/api/users/subscriptions/?omit=recipes')
+        self.assertNotIn('recipes', data['results'][0])
+        self.assertNotIn('recipes_recipe', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        for url, param in (
+            ('/api/recipes/?fields=id,bogus', 'fields'),
+            ('/api/recipes/?omit=bogus', 'omit'),
+            ('/api/users/?fields=password', 'fields'),
+            ('/api/users/me/?omit=bogus', 'omit'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.json())
@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.management import call_command
+
+from .base import APITestCase
+from api.cache import get_cache_version
+from recipes.models import Recipe
+from tags.models import Tag
+
+
+class LoadTagsTests(APITestCase):
+    def load(self, content, *args):
+        descriptor, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            file.write(content)
+        stdout = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('load_tags_json', path, *args, stdout=stdout)
+        return stdout.getvalue().splitlines()[-1]
+
+    def test_update_bumps_tagged_recipes(self):
+        recipe = self.create_recipe()
+        version = get_cache_version(Recipe, recipe.pk)
+        result = self.load(
+            'Завтрак,#000000,breakfast\n', '--on-conflict', 'update'
+        )
+        self.assertIn('0 created, 1 updated', result)
+        self.assertEqual(Tag.objects.get(slug='breakfast').color, '#000000')
+        self.assertNotEqual(get_cache_version(Recipe, recipe.pk), version)
+
+    def test_created_excludes_ignored_conflicts(self):
+        result = self.load('Завтрак,#49B64E,morning\nОбед,#49B64E,lunch\n')
+        self.assertIn('2 read, 1 created, 0 updated, 1 skipped', result)
+        self.assertEqual(
+            set(Tag.objects.values_list('slug', flat=True)),
+            {'breakfast', 'lunch'}
+        )
@@ -0,0 +1,53 @@
+from .base import APITestCase
+from recipes.models import Favorite, Recipe
+
+
+class CursorOrderingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = [
+            self.create_recipe(name=f'Рецепт {number}') for number in range(5)
+        ]
+        fans = [self.create_user(f'fan{number}') for number in range(4)]
+        for popularity, recipe in zip((2, 4, 0, 3, 1), self.recipes):
+            for fan in fans[:popularity]:
+                Favorite.objects.create(user=fan, recipe=recipe)
+
+    def get_all_pages(self, url):
+        names = []
+        while url:
+            data = self.client.get(url).json()
+            names += [recipe['name'] for recipe in data['results']]
+            url = data['next']
+        return names
+
+    def get_expected(self, *ordering):
+        return list(Recipe.objects.order_by(*ordering).values_list(
+            'name', flat=True
+        ))
+
+    def test_cursor_follows_popularity_ordering(self):
+        self.assertEqual(
+            self.get_all_pages(
+                '/api/recipes/?pagination=cursor&ordering=-popularity&limit=2'
+            ),
+            self.get_expected('-favorites_count', '-pub_date', '-id')
+        )
+        self.assertEqual(
+            self.get_all_pages(
+                '/api/recipes/?pagination=cursor&ordering=popularity&limit=2'
+            ),
+            self.get_expected('favorites_count', 'pub_date', 'id')
+        )
+
+    def test_cursor_defaults_to_newest_first(self):
+        self.assertEqual(
+            self.get_all_pages('/api/recipes/?pagination=cursor&limit=2'),
+            self.get_expected('-pub_date', 'id')
+        )
+
+    def test_invalid_ordering_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/?pagination=cursor&ordering=name'
+        )
+        self.assertEqual(response.status_code, 400)
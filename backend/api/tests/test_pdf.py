@@ -0,0 +1,29 @@
+from django.test import override_settings
+
+from .base import APITestCase
+from api.utils import get_pdf_executor
+
+
+class ShoppingCartPdfTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.post(
+            '/api/recipes/shopping_cart/',
+            {'recipes': [self.create_recipe().pk]}, format='json'
+        )
+
+    def download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_inline_render(self):
+        self.assertTrue(self.download().startswith(b'%PDF'))
+        self.assertEqual(get_pdf_executor.cache_info().currsize, 0)
+
+    @override_settings(PDF_RENDER_WORKERS=1)
+    def test_process_pool_render(self):
+        self.addCleanup(get_pdf_executor.cache_clear)
+        self.addCleanup(lambda: get_pdf_executor().shutdown())
+        self.assertTrue(self.download().startswith(b'%PDF'))
+        self.assertEqual(get_pdf_executor.cache_info().currsize, 1)
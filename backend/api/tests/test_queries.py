@@ -0,0 +1,32 @@
+from .base import APITestCase
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+class ListQueriesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(6):
+            author = self.create_user(f'author{number}')
+            recipe = self.create_recipe(author=author, name=f'Рецепт {number}')
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+            Subscription.objects.create(subscriber=self.user, author=author)
+
+    def assert_fixed_queries(self, url, queries, client=None):
+        client = client or self.client
+        for limit in (2, 6):
+            with self.subTest(url=url, limit=limit):
+                with self.assertNumQueries(queries):
+                    response = client.get(url, {'limit': limit})
+                self.assertEqual(len(response.json()['results']), limit)
+
+    def test_recipe_lists(self):
+        self.assert_fixed_queries('/api/recipes/', 5)
+        self.assert_fixed_queries('/api/recipes/', 5, self.get_client())
+        self.assert_fixed_queries('/api/recipes/?pagination=cursor', 5)
+
+    def test_user_lists(self):
+        self.assert_fixed_queries('/api/users/', 2)
+        self.assert_fixed_queries('/api/users/', 2, self.get_client())
+        self.assert_fixed_queries('/api/users/subscriptions/', 3)
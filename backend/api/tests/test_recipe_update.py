@@ -0,0 +1,74 @@
+from .base import APITestCase
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe, ShoppingListItem
+from tags.models import Tag
+
+
+class RecipeUpdateTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.salt, self.milk, self.egg = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'молоко', 'яйцо')
+        )
+        self.dinner, self.lunch = (
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Ужин', '#8775D2', 'dinner'), ('Обед', '#49B64E', 'lunch')
+            )
+        )
+        self.recipe = self.create_recipe()
+        self.recipe.tags.add(self.dinner)
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=self.recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in ((self.salt, 5), (self.milk, 200))
+        )
+        self.client.post(
+            '/api/recipes/shopping_cart/', {'recipes': [self.recipe.pk]},
+            format='json'
+        )
+        self.rows = self.get_rows()
+
+    def get_rows(self):
+        return {
+            item.ingredient_id: (item.pk, item.amount)
+            for item in IngredientRecipe.objects.filter(recipe=self.recipe)
+        }
+
+    def get_tag_rows(self):
+        return dict(Recipe.tags.through.objects.filter(
+            recipe=self.recipe
+        ).values_list('tag_id', 'pk'))
+
+    def test_only_changed_rows_are_written(self):
+        tag_rows = self.get_tag_rows()
+        with self.assertNumQueries(28):
+            response = self.get_client(self.author).patch(
+                f'/api/recipes/{self.recipe.pk}/', {
+                    'tags': [self.tag.pk, self.lunch.pk],
+                    'ingredients': [
+                        {'id': self.ingredient.pk, 'amount': 100},
+                        {'id': self.milk.pk, 'amount': 300},
+                        {'id': self.egg.pk, 'amount': 2},
+                    ],
+                }, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        flour, milk, egg = self.ingredient.pk, self.milk.pk, self.egg.pk
+        rows = self.get_rows()
+        self.assertEqual(rows.keys(), {flour, milk, egg})
+        self.assertEqual(rows[flour], self.rows[flour])
+        self.assertEqual(rows[milk], (self.rows[milk][0], 300))
+        self.assertEqual(rows[egg][1], 2)
+
+        new_tag_rows = self.get_tag_rows()
+        self.assertEqual(new_tag_rows.keys(), {self.tag.pk, self.lunch.pk})
+        self.assertEqual(new_tag_rows[self.tag.pk], tag_rows[self.tag.pk])
+
+        self.assertEqual(dict(ShoppingListItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'amount')), {
+            flour: 100, milk: 300, egg: 2
+        })
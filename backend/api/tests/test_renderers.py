@@ -0,0 +1,45 @@
+from rest_framework.renderers import JSONRenderer
+
+from .base import APITestCase
+from api.renderers import ORJSONRenderer
+from recipes.models import Favorite
+from users.models import Subscription
+
+
+class RendererParityTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(3):
+            recipe = self.create_recipe(name=f'Рецепт «{number}» ')
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+
+    def render_both(self, url):
+        data = self.client.get(url).data
+        expected = JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), expected)
+        return expected
+
+    def test_paginated_payloads(self):
+        for url in (
+            '/api/recipes/?limit=2',
+            '/api/recipes/?pagination=cursor&limit=2',
+            '/api/recipes/?pagination=cursor&count=0',
+            '/api/recipes/feed/?limit=2',
+        ):
+            with self.subTest(url=url):
+                self.render_both(url)
+        self.assertTrue(self.render_both(
+            '/api/recipes/?pagination=cursor&limit=2'
+        ).startswith(b'{"count":3,"next":'))
+
+    def test_nested_payloads(self):
+        recipe = Favorite.objects.get(user=self.user).recipe_id
+        for url in (
+            f'/api/recipes/{recipe}/',
+            '/api/users/subscriptions/?recipes_limit=2',
+            '/api/users/me/',
+            '/api/tags/',
+        ):
+            with self.subTest(url=url):
+                self.render_both(url)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from .base import APITestCase
+from api.cache import build_once, bump_cache_version
+from api.checks import check_replica_cache
+from api.db import replica_reads
+from recipes.models import Recipe
+from tags.models import Tag
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class PrimaryRebuildTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.reads = []
+        for target, value in (
+            ('api.mixins.get_replica_alias', lambda: 'replica'),
+            ('api.db.ReplicaRouter.db_for_read', self.record_read),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def record_read(self, model, **hints):
+        self.reads.append((model, replica_reads.get()))
+
+    def get_reads(self, model):
+        return [replica for read, replica in self.reads if read is model]
+
+    def test_build_once_reads_primary(self):
+        token = replica_reads.set(True)
+        self.addCleanup(replica_reads.reset, token)
+        self.assertFalse(build_once('key', replica_reads.get, 60))
+        self.assertTrue(replica_reads.get())
+
+    def test_versioned_response_is_built_from_primary(self):
+        self.client.get('/api/tags/')
+        self.assertEqual(self.get_reads(Tag), [False])
+        self.reads.clear()
+        self.client.get('/api/tags/')
+        self.assertEqual(self.get_reads(Tag), [])
+
+    def test_fragment_misses_are_built_from_primary(self):
+        self.create_recipe()
+        self.client.get('/api/recipes/')
+        recipe_reads = self.get_reads(Recipe)
+        self.assertIn(True, recipe_reads)
+        self.assertIn(False, recipe_reads)
+        self.assertEqual(set(self.get_reads(Tag)), {False})
+
+        self.reads.clear()
+        self.client.get('/api/recipes/')
+        self.assertEqual(set(self.get_reads(Recipe)), {True})
+        self.assertEqual(self.get_reads(Tag), [])
+
+    def test_retrieve_miss_is_built_from_primary(self):
+        recipe = self.create_recipe()
+        self.client.get(f'/api/recipes/{recipe.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.filter(pk=recipe.pk).update(name='Оладьи')
+            bump_cache_version(Recipe, recipe.pk)
+        self.reads.clear()
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.json()['name'], 'Оладьи')
+        self.assertEqual(set(self.get_reads(Recipe)), {True, False})
+
+
+class ReplicaCacheCheckTests(APITestCase):
+    def test_replica_requires_shared_cache(self):
+        self.assertEqual(check_replica_cache(None), [])
+        with mock.patch('api.checks.get_replica_alias', lambda: 'replica'):
+            self.assertEqual(
+                [warning.id for warning in check_replica_cache(None)],
+                ['api.W002']
+            )
+            with override_settings(CACHE_IS_SHARED=True):
+                self.assertEqual(check_replica_cache(None), [])
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .base import APITestCase
+from api.cache import bump_cache_version
+from ingredients.models import Ingredient
+from ingredients.search import ingredient_index
+from recipes.models import Recipe
+from users.models import Subscription
+
+QUERY = quote('суп')
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for age, (name, text) in enumerate((
+            ('Каша', 'Подавать как гарнир к супу.'),
+            ('Пирог', 'Сладкий пирог.'),
+            ('Суп гороховый', 'Густой суп.'),
+        )):
+            recipe = self.create_recipe(name=name)
+            recipe.text = text
+            recipe.save()
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=age)
+            )
+
+    def get_names(self, url):
+        data = self.client.get(url).json()
+        return [recipe['name'] for recipe in data['results']], data
+
+    def test_results_are_ordered_by_relevance(self):
+        with CaptureQueriesContext(connection) as queries:
+            names, _ = self.get_names(f'/api/recipes/?search={QUERY}')
+        self.assertEqual(names, ['Суп гороховый', 'Каша'])
+        for query in queries:
+            self.assertLessEqual(query['sql'].count('MATCH'), 1)
+
+    def test_cursor_mode_keeps_relevance_with_pages(self):
+        names, data = self.get_names(
+            f'/api/recipes/?search={QUERY}&pagination=cursor&limit=1'
+        )
+        self.assertEqual(names, ['Суп гороховый'])
+        self.assertIn('page=2', data['next'])
+        names, data = self.get_names(data['next'])
+        self.assertEqual(names, ['Каша'])
+        self.assertIsNone(data['next'])
+
+    def test_feed_search_keeps_relevance(self):
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+        names, _ = self.get_names(f'/api/recipes/feed/?search={QUERY}')
+        self.assertEqual(names, ['Суп гороховый', 'Каша'])
+
+
+class IngredientIndexTests(APITestCase):
+    def test_index_follows_cache_version(self):
+        pk = self.ingredient.pk
+        self.assertEqual(ingredient_index.search('мука', 10), [pk])
+        Ingredient.objects.filter(pk=pk).update(name='Соль')
+        self.assertEqual(ingredient_index.search('мука', 10), [pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_cache_version(Ingredient)
+        self.assertEqual(ingredient_index.search('мука', 10), [])
+        self.assertEqual(ingredient_index.search('соль', 10), [pk])
+
+    def test_saved_ingredient_is_found(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient = Ingredient.objects.create(
+                name='Мёд', measurement_unit='г'
+            )
+        self.assertEqual(ingredient_index.search('мед', 10), [ingredient.pk])
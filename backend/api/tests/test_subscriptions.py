@@ -0,0 +1,23 @@
+from .base import APITestCase
+from users.models import Subscription
+
+
+class RecipesLimitTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(3):
+            self.create_recipe(name=f'Рецепт {number}')
+        Subscription.objects.create(subscriber=self.user, author=self.author)
+
+    def get_recipes(self, recipes_limit):
+        response = self.client.get(
+            '/api/users/subscriptions/', {'recipes_limit': recipes_limit}
+        )
+        return response.json()['results'][0]['recipes']
+
+    def test_recipes_limit(self):
+        for recipes_limit, expected in (('0', 0), ('2', 2), ('', 3)):
+            with self.subTest(recipes_limit=recipes_limit):
+                self.assertEqual(
+                    len(self.get_recipes(recipes_limit)), expected
+                )
@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework import routers
 
 from .views import (
-    ExtendedUserViewSet, FavoriteViewSet, IngredientViewSet, RecipeViewSet,
-    ShoppingCartViewSet, TagViewSet,
+    ExtendedUserViewSet, FavoriteViewSet, IngredientViewSet, JobViewSet,
+    MetricsView, RecipeViewSet, ShoppingCartViewSet, TagViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -21,8 +21,10 @@ router.register(
     basename='shoping_cart'
 )
 router.register('users', ExtendedUserViewSet, 'users')
+router.register('jobs', JobViewSet, basename='jobs')
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
@@ -1,25 +1,73 @@
 import io
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
-from foodgram_backend.settings import PDF_FONT
+from .cache import build_once
+from .metrics import timer
+
+PDF_FONT_NAME = 'Arial'
+PDF_FONT_SIZE = 16
+PDF_LINE_HEIGHT = 25
+PDF_MARGIN = 50
+
+
+@lru_cache(maxsize=None)
+def register_pdf_font():
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, settings.PDF_FONT))
+
 
+@lru_cache(maxsize=None)
+def get_pdf_executor():
+    return ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
 
-def get_pdf_shoping_cart(shoping_cart):
+
+def render_pdf_shoping_cart(shoping_cart):
+    register_pdf_font()
     buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer)
-    font_object = TTFont('Arial', PDF_FONT)
-    pdfmetrics.registerFont(font_object)
-    pdf.setFont('Arial', size=16)
+    width, height = A4
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setFont(PDF_FONT_NAME, size=PDF_FONT_SIZE)
+    y = height - PDF_MARGIN
 
     for i, (name, measurement_unit, amount) in enumerate(shoping_cart, 1):
         item = f'{i}. {name}: {amount}{measurement_unit}'
-        pdf.drawString(50, 775 - i * 25, item)
+        for line in simpleSplit(
+            item, PDF_FONT_NAME, PDF_FONT_SIZE, width - 2 * PDF_MARGIN
+        ):
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(PDF_FONT_NAME, size=PDF_FONT_SIZE)
+                y = height - PDF_MARGIN
+            pdf.drawString(PDF_MARGIN, y, line)
+            y -= PDF_LINE_HEIGHT
 
     pdf.showPage()
     pdf.save()
+    return buffer.getvalue()
+
+
+def build_pdf_shoping_cart(shoping_cart):
+    shoping_cart = list(shoping_cart)
+    with timer('pdf'):
+        if settings.PDF_RENDER_WORKERS:
+            return get_pdf_executor().submit(
+                render_pdf_shoping_cart, shoping_cart
+            ).result()
+        return render_pdf_shoping_cart(shoping_cart)
+
 
-    buffer.seek(0)
-    return buffer
+def get_pdf_shoping_cart(shoping_cart, cache_key=None):
+    if cache_key is None:
+        return io.BytesIO(build_pdf_shoping_cart(shoping_cart))
+    return io.BytesIO(build_once(
+        cache_key, lambda: build_pdf_shoping_cart(shoping_cart),
+        settings.PDF_CACHE_TIMEOUT
+    ))
@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum
-from django.http import FileResponse
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -8,46 +8,77 @@ from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .async_views import AsyncViewMixin
+from .cache import get_cache_version
 from .filters import IngredientSearchFilter, RecipeFilter
-from .permissions import IsAuthorOrReadOnlyOrAdmin
+from .metrics import aggregator
+from .mixins import ReplicaReadMixin, SparseFieldsetMixin, VersionedCacheMixin
+from .paginators import CursorPaginationWithLimit, TimelinePagination
+from .permissions import IsAuthorOrReadOnlyOrAdmin, IsMetricsScraper
 from .serializers import (
-    CustomExtendedUserSerializer, FavoriteSerializer, IngredientSerializer,
+    CustomExtendedUserSerializer, CustomUserSerializer, FavoriteSerializer,
+    IngredientSerializer, JobSerializer, RecipeBatchSerializer,
     RecipeReadSerializer, RecipeSerializer, ShoppingCartSerializer,
     SubscriptionSerializer, TagSerializer,
 )
 from .utils import get_pdf_shoping_cart
 from ingredients.models import Ingredient
-from recipes.models import Favorite, Recipe, ShoppingCart
+from jobs.models import Job
+from recipes.models import (
+    Favorite, FeedItem, Recipe, ShoppingCart, ShoppingListItem,
+)
+from recipes.signals import recipes_bulk_changed
 from tags.models import Tag
 from users.models import Subscription
 
 User = get_user_model()
 
 
-class ExtendedUserViewSet(UserViewSet):
+class ExtendedUserViewSet(
+    AsyncViewMixin, ReplicaReadMixin, SparseFieldsetMixin, UserViewSet
+):
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+    replica_actions = ('list',)
+    sparse_actions = ('list', 'retrieve', 'me', 'subscriptions')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = None
+        if self.action in self.sparse_actions:
+            fields = self.get_serializer().selected_fields
+        return CustomUserSerializer.get_related_queries(
+            queryset, self.request.user, fields
+        )
 
     @action(
         detail=False, methods=['GET'],
         permission_classes=(permissions.AllowAny,)
     )
     def subscriptions(self, request, *args, **kwargs):
+        context = {'request': request}
+        fieldset = self.get_sparse_fieldset()
         queryset = User.objects.filter(
             subscriptions_author__subscriber=request.user
-        ).annotate(recipes_count=Count('recipes__id'))
-        queryset = CustomExtendedUserSerializer.get_related_queries(queryset)
+        )
+        queryset = CustomExtendedUserSerializer.get_related_queries(
+            queryset, request.user,
+            CustomExtendedUserSerializer.get_recipes_limit(request),
+            CustomExtendedUserSerializer(
+                context=context, **fieldset
+            ).selected_fields
+        )
 
-        context = {'request': request}
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = CustomExtendedUserSerializer(
-                page, many=True, context=context
+                page, many=True, context=context, **fieldset
             )
             return self.get_paginated_response(serializer.data)
 
         serializer = CustomExtendedUserSerializer(
-            queryset, many=True, context=context
+            queryset, many=True, context=context, **fieldset
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -80,20 +111,34 @@ class ExtendedUserViewSet(UserViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    AsyncViewMixin, ReplicaReadMixin, VersionedCacheMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    AsyncViewMixin, ReplicaReadMixin, VersionedCacheMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
     pagination_class = None
     filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+    cache_query_params = (IngredientSearchFilter.search_param,)
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
 
 
 class FavoriteViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -142,33 +187,163 @@ class ShoppingCartViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    AsyncViewMixin, ReplicaReadMixin, SparseFieldsetMixin,
+    viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnlyOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    sparse_actions = ('list', 'retrieve', 'feed')
+    ranked_query_params = ('search',)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.is_ranked(self.request):
+                self._paginator = self.pagination_class()
+            elif self.action == 'feed' and not self.is_filtered(self.request):
+                self._paginator = TimelinePagination()
+            elif (
+                self.action == 'feed'
+                or CursorPaginationWithLimit.is_requested(self.request)
+            ):
+                self._paginator = CursorPaginationWithLimit()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def is_filtered(self, request):
+        return any(
+            name in request.query_params
+            for name in self.filterset_class.base_filters
+        )
+
+    def is_ranked(self, request):
+        return any(
+            request.query_params.get(name) for name in self.ranked_query_params
+        )
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipeReadSerializer
         return RecipeSerializer
 
     def get_queryset(self):
         serializer = self.get_serializer()
         queryset = Recipe.objects.all()
-        return serializer.get_related_queries(queryset)
+        return serializer.get_related_queries(
+            queryset, self.request.user, serializer.selected_fields
+        )
+
+    def get_batch_ids(self, request):
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    def add_batch(self, request, model):
+        ids = self.get_batch_ids(request)
+        found = set(Recipe.objects.filter(pk__in=ids).values_list(
+            'pk', flat=True
+        ))
+        with transaction.atomic():
+            created = model.objects.add_recipes(
+                request.user.id, [pk for pk in ids if pk in found]
+            )
+            if created:
+                recipes_bulk_changed.send(
+                    sender=model, user_id=request.user.id,
+                    recipe_ids=created, added=True
+                )
+        return Response({'results': {
+            pk: 'not_found' if pk not in found
+            else 'created' if pk in created else 'exists'
+            for pk in ids
+        }})
+
+    def remove_batch(self, request, model):
+        ids = self.get_batch_ids(request)
+        with transaction.atomic():
+            deleted = model.objects.remove_recipes(request.user.id, ids)
+            if deleted:
+                recipes_bulk_changed.send(
+                    sender=model, user_id=request.user.id,
+                    recipe_ids=deleted, added=False
+                )
+        return Response({'results': {
+            pk: 'deleted' if pk in deleted else 'not_found' for pk in ids
+        }})
+
+    @action(
+        detail=False, methods=['POST'], url_path='favorite',
+        permission_classes=[IsAuthenticated]
+    )
+    def favorite_batch(self, request, *args, **kwargs):
+        return self.add_batch(request, Favorite)
+
+    @favorite_batch.mapping.delete
+    def delete_favorite_batch(self, request, *args, **kwargs):
+        return self.remove_batch(request, Favorite)
+
+    @action(
+        detail=False, methods=['POST'], url_path='shopping_cart',
+        permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart_batch(self, request, *args, **kwargs):
+        return self.add_batch(request, ShoppingCart)
+
+    @shopping_cart_batch.mapping.delete
+    def delete_shopping_cart_batch(self, request, *args, **kwargs):
+        return self.remove_batch(request, ShoppingCart)
+
+    @action(
+        detail=False, methods=['GET'], permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if self.is_filtered(request):
+            queryset = self.filter_queryset(serializer.get_related_queries(
+                FeedItem.get_recipes(request.user), request.user,
+                serializer.selected_fields
+            ))
+            page = self.paginate_queryset(queryset)
+        else:
+            ids = self.paginator.paginate_timelines(
+                FeedItem.get_timelines(request.user), request
+            )
+            recipes = serializer.get_related_queries(
+                Recipe.objects.filter(pk__in=ids), request.user,
+                serializer.selected_fields
+            ).in_bulk()
+            page = [recipes[pk] for pk in ids if pk in recipes]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         detail=False, methods=['GET'], permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request, *args, **kwargs):
-        shoping_cart = Ingredient.objects.filter(
-            ingredient_recipe__recipe__shoping_cart__user=request.user
-        ).annotate(
-            amount=Sum('ingredient_recipe__amount')
-        ).values_list('name', 'measurement_unit', 'amount')
+        shoping_cart = ShoppingListItem.objects.filter(
+            user=request.user
+        ).order_by('ingredient__name').values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
+        )
 
-        pdf = get_pdf_shoping_cart(shoping_cart)
+        version = get_cache_version(ShoppingCart, request.user.id)
+        pdf = get_pdf_shoping_cart(
+            shoping_cart, f'shoping_cart_pdf:{request.user.id}:{version}'
+        )
         return FileResponse(
             pdf, as_attachment=True, filename='shopping_cart.pdf'
         )
+
+
+class MetricsView(APIView):
+    permission_classes = (IsMetricsScraper,)
+
+    def get(self, request):
+        return HttpResponse(
+            aggregator.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,49 @@
+import bisect
+import threading
+
+from .models import Ingredient
+from api.cache import get_cache_version
+
+
+def normalize(value):
+    return value.strip().lower().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+
+    def get_snapshot(self):
+        version = get_cache_version(Ingredient)
+        if self._version == version:
+            return self._snapshot
+        with self._lock:
+            if self._version != version:
+                rows = sorted(
+                    (normalize(name), pk) for pk, name
+                    in Ingredient.objects.values_list('pk', 'name')
+                )
+                self._snapshot = (
+                    [key for key, _ in rows], [pk for _, pk in rows]
+                )
+                self._version = version
+        return self._snapshot
+
+    def search(self, term, limit):
+        term = normalize(term)
+        keys, ids = self.get_snapshot()
+        start = bisect.bisect_left(keys, term)
+        end = bisect.bisect_right(keys, term + chr(0x10FFFF))
+        result = ids[start:end][:limit]
+        if len(result) < limit:
+            substring = sorted(
+                (key.find(term), key, pk) for key, pk in zip(keys, ids)
+                if term in key and not key.startswith(term)
+            )
+            result += [pk for _, _, pk in substring[:limit - len(result)]]
+        return result
+
+
+ingredient_index = IngredientIndex()
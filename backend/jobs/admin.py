@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'user', 'created', 'started_at'
+    )
+    search_fields = ('name',)
+    list_filter = ('status', 'name')
+    list_display_links = ('pk', 'name')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,50 @@
+import multiprocessing
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import claim_jobs, execute_job, finish_job, registry
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--sleep", type=float, default=1.0)
+        parser.add_argument("--once", action='store_true')
+
+    def handle(self, *args, **options):
+        processes = ProcessPoolExecutor(
+            options["processes"],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup
+        )
+        threads = ThreadPoolExecutor(options["threads"])
+        try:
+            while True:
+                jobs = claim_jobs(options["processes"] + options["threads"])
+                futures = []
+                for job in jobs:
+                    func = registry.get(job.name)
+                    executor = processes if getattr(
+                        func, 'cpu_bound', False
+                    ) else threads
+                    futures.append((job, executor.submit(
+                        execute_job, job.name, job.args, job.kwargs
+                    )))
+                for job, future in futures:
+                    finish_job(job, *future.result())
+                    self.stdout.write(f'{job.pk} {job.name}: {job.status}')
+                if options["once"]:
+                    break
+                if not jobs:
+                    time.sleep(options["sleep"])
+        finally:
+            processes.shutdown()
+            threads.shutdown()
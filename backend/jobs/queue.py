@@ -0,0 +1,88 @@
+import traceback
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+registry = {}
+
+
+def task(func=None, cpu=False):
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.cpu_bound = cpu
+        registry[func.task_name] = func
+        return func
+    return decorator(func) if func else decorator
+
+
+def enqueue(func, args=(), kwargs=None, user=None, max_attempts=None):
+    job = Job.objects.create(
+        name=func.task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        user=user,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_SYNC:
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.started_at = timezone.now()
+        finish_job(job, *execute_job(job.name, job.args, job.kwargs))
+    return job
+
+
+def execute_job(name, args, kwargs):
+    try:
+        return registry[name](*args, **kwargs), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def claim_jobs(limit):
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.JOBS_LEASE_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(Job.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Job.PENDING, run_after__lte=now)
+            | Q(status=Job.RUNNING, started_at__lt=expired)
+        ).order_by('run_after', 'pk')[:limit])
+        claimed = []
+        for job in jobs:
+            job.updated = now
+            if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.error = 'Задача не завершилась за отведённое время.'
+                continue
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.started_at = now
+            claimed.append(job)
+        Job.objects.bulk_update(
+            jobs, ('status', 'attempts', 'error', 'started_at', 'updated')
+        )
+    return claimed
+
+
+def finish_job(job, result, error):
+    if error is None:
+        job.status = Job.DONE
+        job.result = result
+        job.error = ''
+    elif job.attempts < job.max_attempts:
+        job.status = Job.PENDING
+        job.error = error
+        job.run_after = timezone.now() + timedelta(
+            seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    else:
+        job.status = Job.FAILED
+        job.error = error
+    job.save(update_fields=(
+        'status', 'attempts', 'result', 'error', 'run_after', 'updated'
+    ))
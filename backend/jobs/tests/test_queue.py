@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from api.tests.base import APITestCase
+from jobs.models import Job
+from jobs.queue import claim_jobs
+
+
+@override_settings(JOBS_LEASE_TIMEOUT=60)
+class ClaimJobsTests(APITestCase):
+    def create_job(self, **kwargs):
+        return Job.objects.create(
+            name='recipes.tasks.fan_out_recipe', **kwargs
+        )
+
+    def test_claim_sets_lease(self):
+        job = self.create_job()
+        self.assertEqual([claimed.pk for claimed in claim_jobs(10)], [job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.started_at)
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = self.create_job(
+            status=Job.RUNNING, attempts=1,
+            started_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual([claimed.pk for claimed in claim_jobs(10)], [job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_job_without_attempts_left_fails(self):
+        job = self.create_job(
+            status=Job.RUNNING, attempts=3, max_attempts=3,
+            started_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(claim_jobs(10), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+
+class JobViewSetTests(APITestCase):
+    def test_author_sees_recipe_jobs(self):
+        self.create_recipe()
+        job = Job.objects.get(name='recipes.tasks.update_image_variants')
+        self.assertEqual(job.user, self.author)
+        response = self.get_client(self.author).get(f'/api/jobs/{job.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], Job.DONE)
+        response = self.client.get(f'/api/jobs/{job.pk}/')
+        self.assertEqual(response.status_code, 404)
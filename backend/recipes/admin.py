@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Favorite, IngredientRecipe, Recipe, ShoppingCart
+from .models import (
+    Favorite, FeedItem, IngredientRecipe, Recipe, ShoppingCart,
+    ShoppingListItem,
+)
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -14,7 +17,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description='Popularity')
     def get_popularity(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -35,6 +38,18 @@ class IngredientRecipeAdmin(admin.ModelAdmin):
     list_display_links = ('pk', 'ingredient', 'recipe')
 
 
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'ingredient', 'amount')
+    search_fields = ('user', 'ingredient')
+    list_display_links = ('pk', 'user', 'ingredient')
+
+
+class FeedItemAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'recipe', 'pub_date')
+    search_fields = ('user', 'recipe')
+    list_display_links = ('pk', 'user', 'recipe')
+
+
 class TagRecipeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'tag', 'recipe')
     search_fields = ('tag', 'recipe')
@@ -45,3 +60,5 @@ admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
 admin.site.register(ShoppingCart, ShoppingCartAdmin)
 admin.site.register(IngredientRecipe, IngredientRecipeAdmin)
+admin.site.register(ShoppingListItem, ShoppingListItemAdmin)
+admin.site.register(FeedItem, FeedItemAdmin)
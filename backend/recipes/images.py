@@ -0,0 +1,42 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(
+        buffer, settings.RECIPE_IMAGE_FORMAT,
+        quality=settings.RECIPE_IMAGE_QUALITY, optimize=True
+    )
+    return buffer.getvalue()
+
+
+def build_image_variants(recipe):
+    storage = recipe.image.storage
+    stem = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    extension = EXTENSIONS[settings.RECIPE_IMAGE_FORMAT]
+    with recipe.image.open('rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file)).convert('RGB')
+    variants = {'source': recipe.image.name}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        name = f'recipes/variants/{stem}_{variant}.{extension}'
+        if storage.exists(name):
+            storage.delete(name)
+        variants[variant] = storage.save(
+            name, ContentFile(render_variant(image, size))
+        )
+    return variants
+
+
+def delete_image_variants(storage, variants):
+    for variant, name in variants.items():
+        if variant != 'source' and name:
+            storage.delete(name)
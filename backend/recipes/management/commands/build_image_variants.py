@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.tasks import refresh_image_variants
+
+
+class Command(BaseCommand):
+    help = "Builds resized image variants for recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action='store_true')
+
+    def handle(self, *args, **options):
+        for recipe in Recipe.objects.only('pk', 'image', 'image_variants'):
+            refresh_image_variants(recipe, options["force"])
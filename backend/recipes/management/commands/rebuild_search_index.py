@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of recipes."
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        update_search_index()
+        self.stdout.write('Search index rebuilt')
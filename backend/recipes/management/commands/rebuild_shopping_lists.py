@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+from recipes.signals import shopping_list_changed
+
+
+class Command(BaseCommand):
+    help = "Rebuilds aggregated shopping lists from shopping carts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, nargs='*', dest='user_ids')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        user_ids = ShoppingListItem.rebuild(options["user_ids"])
+        shopping_list_changed.send(sender=ShoppingListItem, user_ids=user_ids)
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_by(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Recalculates denormalized favorite, recipe and follower counts."
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_by(Favorite, 'recipe')
+        )
+        users = User.objects.update(
+            recipes_count=count_by(Recipe, 'author'),
+            subscribers_count=count_by(Subscription, 'author'),
+        )
+        if options["verbosity"] >= 1:
+            self.stdout.write(f'Recipes: {recipes}, users: {users}')
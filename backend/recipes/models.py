@@ -1,15 +1,24 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import Case, F, Sum, Value, When
 from django.db.models.constraints import UniqueConstraint
 
 from ingredients.models import Ingredient
 from tags.models import Tag
+from users.models import CountersMixin
 
 User = get_user_model()
 
 
-class Recipe(models.Model):
+class RecipeManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
+class Recipe(CountersMixin, models.Model):
     name = models.CharField(max_length=256)
     text = models.TextField()
     image = models.ImageField(upload_to='recipes/')
@@ -22,15 +31,40 @@ class Recipe(models.Model):
         Ingredient, through='IngredientRecipe', related_name='recipes'
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    favorites_count = models.IntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
+    counter_fields = ('favorites_count',)
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-pub_date', 'id'), name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date'),
+                name='recipe_popularity_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    def get_image_url(self, variant=None):
+        name = self.image_variants.get(variant)
+        if name and self.image_variants.get('source') == self.image.name:
+            return self.image.storage.url(name)
+        return self.image.url
+
 
 class IngredientRecipe(models.Model):
     ingredient = models.ForeignKey(
@@ -55,6 +89,47 @@ class IngredientRecipe(models.Model):
         return f'{self.recipe.name} - {self.ingredient.name} ({self.amount})'
 
 
+class UserRecipeManager(models.Manager):
+    def get_connection(self):
+        return connections[router.db_for_write(self.model)]
+
+    def execute_returning(self, sql, params):
+        with self.get_connection().cursor() as cursor:
+            cursor.execute(sql, params)
+            return [recipe_id for recipe_id, in cursor.fetchall()]
+
+    def get_columns(self):
+        opts = self.model._meta
+        quote_name = self.get_connection().ops.quote_name
+        return (
+            quote_name(opts.db_table),
+            quote_name(opts.get_field('user').column),
+            quote_name(opts.get_field('recipe').column),
+        )
+
+    def add_recipes(self, user_id, recipe_ids):
+        if not recipe_ids:
+            return []
+        table, user, recipe = self.get_columns()
+        values = ', '.join(['(%s, %s)'] * len(recipe_ids))
+        return self.execute_returning(
+            f'INSERT INTO {table} ({user}, {recipe}) VALUES {values} '
+            f'ON CONFLICT DO NOTHING RETURNING {recipe}',
+            [value for pk in recipe_ids for value in (user_id, pk)]
+        )
+
+    def remove_recipes(self, user_id, recipe_ids):
+        if not recipe_ids:
+            return []
+        table, user, recipe = self.get_columns()
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        return self.execute_returning(
+            f'DELETE FROM {table} WHERE {user} = %s '
+            f'AND {recipe} IN ({placeholders}) RETURNING {recipe}',
+            [user_id, *recipe_ids]
+        )
+
+
 class ShoppingCart(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name='shoping_cart'
@@ -63,6 +138,8 @@ class ShoppingCart(models.Model):
         User, on_delete=models.CASCADE, related_name='shoping_cart'
     )
 
+    objects = UserRecipeManager()
+
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
@@ -85,6 +162,8 @@ class Favorite(models.Model):
         User, on_delete=models.CASCADE, related_name='favorites'
     )
 
+    objects = UserRecipeManager()
+
     class Meta:
         verbose_name = 'Избранное'
         constraints = (
@@ -96,3 +175,167 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user.username} {self.recipe.name}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name='shopping_list'
+    )
+    amount = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списка покупок'
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'ingredient',),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user.username} {self.ingredient.name} ({self.amount})'
+
+    @classmethod
+    def change_amounts(cls, user_ids, amounts):
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id, ingredient_id=ingredient)
+                for user_id in user_ids for ingredient in amounts
+            ],
+            ignore_conflicts=True
+        )
+        items = cls.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=amounts
+        )
+        items.update(amount=F('amount') + Case(
+            *[When(ingredient_id=ingredient, then=Value(amount))
+              for ingredient, amount in amounts.items()],
+            default=Value(0)
+        ))
+        items.filter(amount__lte=0).delete()
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        carts = ShoppingCart.objects.all()
+        items = cls.objects.all()
+        if user_ids is not None:
+            carts = carts.filter(user_id__in=user_ids)
+            items = items.filter(user_id__in=user_ids)
+        affected = set(items.values_list('user_id', flat=True))
+        affected.update(carts.values_list('user_id', flat=True))
+        items.delete()
+        totals = carts.values(
+            'user_id', ingredient_id=F('recipe__ingredient_recipe__ingredient')
+        ).annotate(
+            total=Sum('recipe__ingredient_recipe__amount')
+        ).filter(total__gt=0)
+        cls.objects.bulk_create(
+            cls(
+                user_id=total['user_id'],
+                ingredient_id=total['ingredient_id'],
+                amount=total['total']
+            ) for total in totals
+        )
+        return affected
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name='feed_items'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            UniqueConstraint(
+                fields=('user', 'recipe',),
+                name='unique_feed_item'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_timeline_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'), name='feed_user_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user.username} {self.recipe.name}'
+
+    @classmethod
+    def push(cls, recipe, user_ids):
+        cls.objects.bulk_create(
+            (
+                cls(
+                    user_id=user_id, recipe_id=recipe.pk,
+                    author_id=recipe.author_id, pub_date=recipe.pub_date
+                ) for user_id in user_ids
+            ),
+            batch_size=settings.FEED_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def backfill(cls, user_id, author_id):
+        recipes = Recipe.objects.filter(author_id=author_id).order_by(
+            '-pub_date'
+        ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+        cls.objects.bulk_create(
+            (
+                cls(
+                    user_id=user_id, recipe_id=recipe_id,
+                    author_id=author_id, pub_date=pub_date
+                ) for recipe_id, pub_date in recipes
+            ),
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def trim(cls, user_id, author_id):
+        cls.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+    @classmethod
+    def get_pulled_authors(cls, user):
+        return list(User.objects.filter(
+            subscriptions_author__subscriber=user,
+            subscribers_count__gt=settings.FEED_FANOUT_LIMIT
+        ).values_list('pk', flat=True))
+
+    @classmethod
+    def get_timelines(cls, user):
+        pulled_authors = cls.get_pulled_authors(user)
+        timelines = [
+            cls.objects.filter(user=user).exclude(
+                author_id__in=pulled_authors
+            ).values_list('pub_date', 'recipe_id')
+        ]
+        if pulled_authors:
+            timelines.append(
+                Recipe.objects.filter(author_id__in=pulled_authors).annotate(
+                    recipe_id=F('pk')
+                ).values_list('pub_date', 'recipe_id')
+            )
+        return timelines
+
+    @classmethod
+    def get_recipes(cls, user):
+        timeline = cls.objects.filter(user=user).values('recipe_id')
+        pulled = Recipe.objects.filter(
+            author_id__in=cls.get_pulled_authors(user)
+        ).order_by().values('pk')
+        return Recipe.objects.filter(pk__in=timeline.union(pulled))
@@ -0,0 +1,82 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector,
+)
+from django.db import connection
+from django.db.models import F
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_WEIGHTS = (10.0, 1.0)
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def get_search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def get_fts_match(query):
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', query.lower()))
+
+
+def update_search_index(recipe_ids=None):
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    if is_postgresql():
+        recipes.update(search_vector=get_search_vector())
+        return
+    remove_from_search_index(recipe_ids)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) VALUES (%s, %s, %s)',
+            list(recipes.values_list('pk', 'name', 'text'))
+        )
+
+
+def remove_from_search_index(recipe_ids=None):
+    if is_postgresql():
+        return
+    with connection.cursor() as cursor:
+        if recipe_ids is None:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            return
+        recipe_ids = list(recipe_ids)
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'({", ".join(["%s"] * len(recipe_ids))})',
+            recipe_ids
+        )
+
+
+def search_recipes(queryset, query):
+    if is_postgresql():
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-pub_date')
+    match = get_fts_match(query)
+    if not match:
+        return queryset.none()
+    recipe_id = '{}.{}'.format(
+        connection.ops.quote_name(Recipe._meta.db_table),
+        connection.ops.quote_name('id')
+    )
+    return queryset.extra(
+        select={'search_rank': f'-bm25({FTS_TABLE}, %s, %s)'},
+        select_params=FTS_WEIGHTS,
+        tables=(FTS_TABLE,),
+        where=(f'{FTS_TABLE}.rowid = {recipe_id}', f'{FTS_TABLE} MATCH %s'),
+        params=(match,)
+    ).order_by('-search_rank', '-pub_date')
@@ -0,0 +1,225 @@
+import threading
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import images, search, tasks
+from .models import (
+    Favorite, FeedItem, IngredientRecipe, Recipe, ShoppingCart,
+    ShoppingListItem,
+)
+from jobs.queue import enqueue
+from users.models import Subscription, subscribers_decreased
+
+User = get_user_model()
+
+shopping_list_changed = Signal()
+recipes_bulk_changed = Signal()
+
+_state = threading.local()
+
+
+@contextmanager
+def defer_shopping_list_updates():
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = False
+
+
+def is_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def update_shopping_lists(user_ids, amounts):
+    amounts = {
+        ingredient: amount for ingredient, amount in amounts.items()
+        if amount
+    }
+    if user_ids and amounts:
+        ShoppingListItem.change_amounts(user_ids, amounts)
+        shopping_list_changed.send(
+            sender=ShoppingListItem, user_ids=user_ids
+        )
+
+
+def get_recipe_amounts(recipe_id, sign=1):
+    return {
+        ingredient: sign * amount for ingredient, amount
+        in IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    }
+
+
+def get_recipes_amounts(recipe_ids, sign=1):
+    return {
+        ingredient: sign * amount for ingredient, amount
+        in IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values('ingredient_id').annotate(
+            total=Sum('amount')
+        ).values_list('ingredient_id', 'total')
+    }
+
+
+def get_cart_users(recipe_id):
+    return list(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def update_image_variants(sender, instance, **kwargs):
+    if instance.image and (
+        instance.image_variants.get('source') != instance.image.name
+    ):
+        enqueue(
+            tasks.update_image_variants, args=(instance.pk,),
+            user=instance.author
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_image_variants(sender, instance, **kwargs):
+    storage = instance.image.storage
+    variants = dict(instance.image_variants)
+    transaction.on_commit(
+        lambda: images.delete_image_variants(storage, variants)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'name', 'text'} & set(update_fields):
+        search.update_search_index([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    search.remove_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            tasks.fan_out_recipe, args=(instance.pk,), user=instance.author
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        FeedItem.backfill(instance.subscriber_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def trim_feed(sender, instance, **kwargs):
+    FeedItem.trim(instance.subscriber_id, instance.author_id)
+
+
+@receiver(subscribers_decreased, sender=User)
+def refill_subscribers_feed(sender, author_id, **kwargs):
+    if User.objects.filter(
+        pk=author_id, subscribers_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        enqueue(tasks.backfill_subscribers_feed, args=(author_id,))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        update_shopping_lists(
+            [instance.user_id], get_recipe_amounts(instance.recipe_id)
+        )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    update_shopping_lists(
+        [instance.user_id], get_recipe_amounts(instance.recipe_id, sign=-1)
+    )
+
+
+@receiver(pre_save, sender=IngredientRecipe)
+def remember_ingredient_recipe(sender, instance, **kwargs):
+    instance.previous = (
+        not is_deferred() and instance.pk
+        and IngredientRecipe.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', 'amount').first()
+    )
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def change_shopping_lists(sender, instance, **kwargs):
+    if is_deferred():
+        return
+    amounts = {instance.ingredient_id: instance.amount}
+    if getattr(instance, 'previous', None):
+        ingredient, amount = instance.previous
+        amounts[ingredient] = amounts.get(ingredient, 0) - amount
+    update_shopping_lists(get_cart_users(instance.recipe_id), amounts)
+
+
+@receiver(post_delete, sender=IngredientRecipe)
+def subtract_from_shopping_lists(sender, instance, **kwargs):
+    if is_deferred():
+        return
+    update_shopping_lists(
+        get_cart_users(instance.recipe_id),
+        {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        favorites_count=F('favorites_count') - 1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).update(
+        recipes_count=F('recipes_count') - 1
+    )
+
+
+@receiver(recipes_bulk_changed, sender=Favorite)
+def update_favorites_counts(sender, recipe_ids, added, **kwargs):
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        favorites_count=F('favorites_count') + (1 if added else -1)
+    )
+
+
+@receiver(recipes_bulk_changed, sender=ShoppingCart)
+def update_shopping_list_in_bulk(sender, user_id, recipe_ids, added,
+                                 **kwargs):
+    update_shopping_lists(
+        [user_id], get_recipes_amounts(recipe_ids, 1 if added else -1)
+    )
@@ -0,0 +1,57 @@
+from django.conf import settings
+
+from .images import build_image_variants, delete_image_variants
+from .models import FeedItem, Recipe
+from jobs.queue import task
+from users.models import Subscription
+
+
+def refresh_image_variants(recipe, force=False):
+    if not force and (
+        recipe.image_variants.get('source') == recipe.image.name
+    ):
+        return None
+    previous = recipe.image_variants
+    recipe.image_variants = build_image_variants(recipe)
+    recipe.save(update_fields=('image_variants',))
+    delete_image_variants(recipe.image.storage, {
+        variant: name for variant, name in previous.items()
+        if name not in recipe.image_variants.values()
+    })
+    return recipe.image_variants
+
+
+@task(cpu=True)
+def update_image_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None:
+        return None
+    return refresh_image_variants(recipe)
+
+
+@task
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.select_related('author').filter(
+        pk=recipe_id
+    ).first()
+    if recipe is None or (
+        recipe.author.subscribers_count > settings.FEED_FANOUT_LIMIT
+    ):
+        return 0
+    subscribers = list(recipe.author.subscriptions_author.values_list(
+        'subscriber_id', flat=True
+    ))
+    FeedItem.push(recipe, subscribers)
+    return len(subscribers)
+
+
+@task
+def backfill_subscribers_feed(author_id):
+    subscribers = list(Subscription.objects.filter(
+        author_id=author_id
+    ).values_list('subscriber_id', flat=True))
+    for recipe in Recipe.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    ).order_by('-pub_date')[:settings.FEED_BACKFILL_SIZE]:
+        FeedItem.push(recipe, subscribers)
+    return len(subscribers)
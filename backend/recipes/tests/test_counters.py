@@ -0,0 +1,54 @@
+from api.tests.base import APITestCase
+from recipes.models import Favorite, Recipe
+from users.models import Subscription, User
+
+
+class StaleSaveTests(APITestCase):
+    def test_stale_recipe_save_keeps_favorites_count(self):
+        recipe = Recipe.objects.get(pk=self.create_recipe().pk)
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        recipe.name = 'Оладьи'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Оладьи')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_stale_user_save_keeps_counters(self):
+        author = User.objects.get(pk=self.author.pk)
+        self.create_recipe(author=self.author)
+        Subscription.objects.create(author=self.author, subscriber=self.user)
+        author.first_name = 'Иван'
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.first_name, 'Иван')
+        self.assertEqual(author.recipes_count, 1)
+        self.assertEqual(author.subscribers_count, 1)
+
+    def test_stale_request_user_saves_keep_counters(self):
+        client = self.get_client(self.author)
+        Subscription.objects.create(author=self.author, subscriber=self.user)
+        response = client.patch(
+            '/api/users/me/', {'first_name': 'Иван'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        response = client.post('/api/users/set_password/', {
+            'current_password': 'pass-12345', 'new_password': 'pass-67890'
+        }, format='json')
+        self.assertEqual(response.status_code, 204, response.content)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.first_name, 'Иван')
+        self.assertEqual(self.author.subscribers_count, 1)
+
+    def test_recipe_update_keeps_favorites_count(self):
+        recipe = self.create_recipe()
+        client = self.get_client(self.author)
+        client.get(f'/api/recipes/{recipe.pk}/')
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        response = client.patch(f'/api/recipes/{recipe.pk}/', {
+            'name': 'Оладьи',
+            'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 50}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
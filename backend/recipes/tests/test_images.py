@@ -0,0 +1,58 @@
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from api.cache import get_cache_version
+from api.tests.base import APITestCase, get_image_content
+from recipes.models import Recipe
+
+
+class ImageVariantTests(APITestCase):
+    def get_variant_names(self, recipe):
+        recipe.refresh_from_db()
+        return [
+            name for variant, name in recipe.image_variants.items()
+            if variant != 'source'
+        ]
+
+    def test_replaced_image_removes_previous_variants(self):
+        recipe = self.create_recipe()
+        storage = recipe.image.storage
+        previous = self.get_variant_names(recipe)
+        self.assertTrue(previous)
+        self.assertTrue(all(storage.exists(name) for name in previous))
+        recipe.image = SimpleUploadedFile(
+            'other.png', get_image_content('blue'), 'image/png'
+        )
+        recipe.save()
+        current = self.get_variant_names(recipe)
+        self.assertTrue(all(storage.exists(name) for name in current))
+        self.assertFalse(any(storage.exists(name) for name in previous))
+
+    def test_deleted_recipe_removes_variants(self):
+        recipe = self.create_recipe()
+        storage = recipe.image.storage
+        names = self.get_variant_names(recipe)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+    def test_stale_variants_are_not_served(self):
+        recipe = self.create_recipe()
+        recipe.image_variants['source'] = 'recipes/other.png'
+        self.assertEqual(recipe.get_image_url('card'), recipe.image.url)
+
+    def test_command_bumps_version_and_removes_stale_variants(self):
+        recipe = self.create_recipe()
+        storage = recipe.image.storage
+        stale = storage.save('recipes/variants/stale.jpg', ContentFile(b''))
+        Recipe.objects.filter(pk=recipe.pk).update(image_variants={
+            'source': 'recipes/other.png', 'card': stale
+        })
+        version = get_cache_version(Recipe, recipe.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('build_image_variants')
+        self.assertNotEqual(get_cache_version(Recipe, recipe.pk), version)
+        self.assertFalse(storage.exists(stale))
+        current = self.get_variant_names(recipe)
+        self.assertTrue(all(storage.exists(name) for name in current))
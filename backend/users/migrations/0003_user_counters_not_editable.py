@@ -0,0 +1,23 @@
+# Generated by Django 3.2.13 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='recipes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
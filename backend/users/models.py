@@ -1,10 +1,56 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
+from django.dispatch import Signal
 
+users_updated = Signal()
+subscribers_decreased = Signal()
 
-class User(AbstractUser):
+
+class CountersMixin:
+    counter_fields = ()
+
+    def get_unsaved_fields(self):
+        return set(self.counter_fields)
+
+    def save(self, *args, **kwargs):
+        if (
+            not args and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert') and not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            unsaved = self.get_unsaved_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in unsaved
+            ]
+        super().save(*args, **kwargs)
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if not set(kwargs) & set(self.model.token_cache_fields):
+            return super().update(**kwargs)
+        pks = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        users_updated.send(sender=self.model, pks=pks)
+        return updated
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+class User(CountersMixin, AbstractUser):
     email = models.EmailField('email', unique=True)
+    recipes_count = models.IntegerField(default=0, editable=False)
+    subscribers_count = models.IntegerField(default=0, editable=False)
+
+    objects = CustomUserManager()
+    counter_fields = ('recipes_count', 'subscribers_count')
+    token_cache_fields = ('id', 'is_active', 'is_staff', 'is_superuser')
+    token_cache_values = None
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
     USERNAME_FIELD = 'email'
 
@@ -15,6 +61,20 @@ class User(AbstractUser):
     def __str__(self):
         return f'{self.first_name} {self.last_name} ({self.username})'
 
+    def get_unsaved_fields(self):
+        unsaved = super().get_unsaved_fields()
+        if self.token_cache_values is not None:
+            unsaved.update(
+                name for name, value in self.token_cache_values.items()
+                if getattr(self, name) == value
+            )
+        return unsaved
+
+    def refresh_from_db(self, using=None, fields=None):
+        if fields is not None and self.token_cache_values is not None:
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using, fields)
+
 
 class Subscription(models.Model):
     author = models.ForeignKey(